@@ -0,0 +1,387 @@
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import payslip_render
+import salary_template_generator as stg
+
+# Seed used for every generated record, so runs are comparable
+DEFAULT_SEED = 1234
+
+# End-to-end scenario sizes (number of payslips); the larger ones only run on request
+SCENARIO_SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+DEFAULT_SCENARIOS = ["generate-1k", "render-1k"]
+
+# Metrics compared against the baseline; higher values are regressions
+COMPARED_METRICS = ["us_per_call", "wall_s", "cpu_s", "peak_rss_kib"]
+
+# Cold start budget of each CLI in ms: the time `<script> --help` takes on top of
+# starting a bare interpreter, best of STARTUP_RUNS. Measured at 40-110 ms on
+# loaded one-CPU machines; the budgets leave about twice that, and importing a
+# LAZY_MODULES entry at start-up fails the check whatever the timing
+STARTUP_BUDGETS_MS = {
+    "salary_template_generator.py": 200,
+    "test_data_generator.py": 120,
+    "payslip_pipeline.py": 200,
+}
+STARTUP_RUNS = 9
+
+# Only imported on first use; a CLI that loads one of these to print --help is over budget
+LAZY_MODULES = ["reportlab", "faker", "numpy", "multiprocessing"]
+
+# Runs a CLI's --help and prints the LAZY_MODULES it imported as JSON
+_STARTUP_PROBE = """
+import contextlib, io, json, os, runpy, sys
+script = sys.argv[1]
+sys.argv = [script, "--help"]
+sys.path.insert(0, os.path.dirname(script))
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        pass
+print(json.dumps([name for name in %r if name in sys.modules]))
+""" % (LAZY_MODULES,)
+
+
+def seed_generators(seed):
+    """Seed the global random module and Faker used by the test data generator."""
+    import test_data_generator
+
+    random.seed(seed)
+    test_data_generator.fake.seed_instance(seed)
+
+
+def load_sample(path=None, seed=DEFAULT_SEED):
+    """Load one payslip record from a JSON file, or generate one."""
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    from test_data_generator import generate_payslip_data
+    seed_generators(seed)
+    return generate_payslip_data(base_salary=4500.00)
+
+
+def measure_elements(data, iterations, shared_styles):
+    """Build payslip flowables and return (seconds, bytes) per payslip."""
+    # Warm up so one-off setup costs are not counted
+    payslip_render.clear_style_caches()
+    payslip_render.create_payslip_elements(data)
+
+    def build():
+        if not shared_styles:
+            # Rebuild styles and labels for every payslip, like the original code did
+            payslip_render.clear_style_caches()
+        return payslip_render.create_payslip_elements(data)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build()
+    elapsed = time.perf_counter() - start
+
+    # Measure memory separately, tracing slows everything down
+    kept = []
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    for _ in range(iterations):
+        kept.append(build())
+    allocated = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+
+    return elapsed / iterations, allocated / iterations
+
+
+def bench_styles(data, iterations=200):
+    """Compare per-payslip cost of shared styles against rebuilding them each time."""
+    results = {}
+    for label, shared in (("rebuilt", False), ("shared", True)):
+        seconds, allocated = measure_elements(data, iterations, shared)
+        results[label] = {"ms_per_payslip": seconds * 1000, "kib_per_payslip": allocated / 1024}
+
+    print(f"{'styles':<10}{'ms/payslip':>14}{'KiB/payslip':>14}")
+    for label, result in results.items():
+        print(f"{label:<10}{result['ms_per_payslip']:>14.3f}{result['kib_per_payslip']:>14.1f}")
+    saved = results["rebuilt"]["kib_per_payslip"] - results["shared"]["kib_per_payslip"]
+    print(f"Allocation savings: {saved:.1f} KiB per payslip")
+    return results
+
+
+def render_via_temp_file(data, engine):
+    """Render through a temp file and read it back, as a file-only API forces callers to."""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        payslip_render.RENDER_ENGINES[engine](path, data)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def bench_render_bytes(data, iterations=200, engine="platypus"):
+    """Compare latency of render_payslip_bytes against rendering via a temp file."""
+    candidates = {
+        "temp file": lambda: render_via_temp_file(data, engine),
+        "in memory": lambda: payslip_render.render_payslip_bytes(data, engine),
+    }
+    results = {}
+    for label, render in candidates.items():
+        render()  # warm up
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            render()
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        results[label] = {
+            "p50_ms": statistics.median(latencies),
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        }
+
+    print(f"{'render (' + engine + ')':<22}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, result in results.items():
+        print(f"{label:<22}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+    return results
+
+
+def time_call(func, repeat=5):
+    """Return the best time per call of func in microseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def bench_micro(data, engine="platypus"):
+    """Time the building blocks of data generation and rendering per call."""
+    from test_data_generator import calculate_financial_data
+
+    candidates = {
+        "format_currency": lambda: payslip_render.format_currency(12345.678),
+        "calculate_financial_data": lambda: calculate_financial_data(4500.00),
+        "create_custom_styles": payslip_render.create_custom_styles,
+        "create_custom_styles (cold)": payslip_render._build_custom_styles,
+        "create_lohnart_table": lambda: payslip_render.create_lohnart_table(data),
+        "create_payslip": lambda: payslip_render.render_payslip_bytes(data, engine),
+    }
+    results = {name: {"us_per_call": round(time_call(func), 3)} for name, func in candidates.items()}
+
+    print(f"{'microbenchmark':<30}{'us/call':>14}")
+    for name, result in results.items():
+        print(f"{name:<30}{result['us_per_call']:>14.3f}")
+    return results
+
+
+def _directory_bytes(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+
+def _cpu_seconds():
+    """CPU time (user + system) of this process and its finished children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _peak_rss_kib():
+    """Peak RSS of this process or its largest child, in KiB."""
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / 1024 if sys.platform == "darwin" else peak
+
+
+def _generate_payslips(count, output_dir, seed):
+    from test_data_generator import generate_test_data
+
+    generate_test_data(num_employees=max(1, count // 10), months_per_employee=min(count, 10), output_dir=output_dir, seed=seed)
+
+
+def run_scenario(name, seed=DEFAULT_SEED, workers=None, engine="platypus"):
+    """Run one end-to-end scenario in this process and return its measurements."""
+    kind, size = name.split("-")
+    count = SCENARIO_SIZES[size]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = os.path.join(temp_dir, "data")
+        if kind == "generate":
+            start_wall, start_cpu = time.perf_counter(), _cpu_seconds()
+            _generate_payslips(count, data_dir, seed)
+            output_dir = data_dir
+        else:
+            _generate_payslips(count, data_dir, seed)
+            output_dir = os.path.join(temp_dir, "pdf")
+            start_wall, start_cpu = time.perf_counter(), _cpu_seconds()
+            stg.generate_pdfs_from_json(data_dir, output_dir, workers=workers, engine=engine)
+        return {
+            "payslips": count,
+            "wall_s": round(time.perf_counter() - start_wall, 3),
+            "cpu_s": round(_cpu_seconds() - start_cpu, 3),
+            "peak_rss_kib": round(_peak_rss_kib()),
+            "output_bytes": _directory_bytes(output_dir),
+        }
+
+
+def bench_scenario(name, seed=DEFAULT_SEED, workers=None, engine="platypus"):
+    """Run a scenario in a fresh interpreter so peak RSS and CPU time are its own."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_file = f.name
+    try:
+        command = [
+            sys.executable, os.path.abspath(__file__),
+            "--run-scenario", name, "--result-file", result_file,
+            "--seed", str(seed), "--engine", engine,
+        ]
+        if workers is not None:
+            command += ["--workers", str(workers)]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(result_file, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    finally:
+        os.remove(result_file)
+
+    print(
+        f"{name:<16}{result['wall_s']:>10.3f} s wall{result['cpu_s']:>10.3f} s cpu"
+        f"{result['peak_rss_kib'] / 1024:>10.1f} MiB rss{result['output_bytes'] / 1024 / 1024:>10.1f} MiB out"
+    )
+    return result
+
+
+def _best_startup_time(command, runs):
+    """Best wall time of running command in a fresh interpreter, in seconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_startup(budgets=STARTUP_BUDGETS_MS, runs=STARTUP_RUNS):
+    """Time the cold start of every CLI in a fresh interpreter and check it against its budget.
+
+    The interpreter's own start-up is measured alongside and subtracted, so
+    the budgets hold for the CLI's imports on slower and faster machines
+    alike. Returns the results by script and the scripts that are over
+    budget or import one of LAZY_MODULES at start-up.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results, over_budget = {}, []
+    print(f"{'startup':<30}{'ms':>10}{'budget':>10}  eager imports")
+    for script, budget in budgets.items():
+        path = os.path.join(here, script)
+        bare = _best_startup_time([sys.executable, "-c", "pass"], runs)
+        startup = max(0.0, _best_startup_time([sys.executable, path, "--help"], runs) - bare)
+        probe = subprocess.run([sys.executable, "-c", _STARTUP_PROBE, path], check=True, capture_output=True, text=True)
+        eager = json.loads(probe.stdout)
+
+        wall_ms = startup * 1000
+        results[script] = {"wall_s": round(startup, 4), "budget_ms": budget, "eager_imports": eager}
+        flag = " !" if wall_ms > budget or eager else ""
+        print(f"{script:<30}{wall_ms:>10.1f}{budget:>10}  {', '.join(eager) or '-'}{flag}")
+        if flag:
+            over_budget.append(script)
+    return results, over_budget
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """Print the change of every compared metric and return the regressions beyond threshold."""
+    regressions = []
+    print(f"{'benchmark':<45}{'baseline':>12}{'current':>12}{'change':>10}")
+    for group, entries in results.items():
+        for name, metrics in entries.items():
+            for metric in COMPARED_METRICS:
+                old = baseline.get(group, {}).get(name, {}).get(metric)
+                new = metrics.get(metric) if isinstance(metrics, dict) else None
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                flag = " !" if change > threshold else ""
+                print(f"{group + '/' + name + ' ' + metric:<45}{old:>12.3f}{new:>12.3f}{change:>+9.1%}{flag}")
+                if change > threshold:
+                    regressions.append((group, name, metric, change))
+    return regressions
+
+
+BENCHMARKS = {
+    "styles": lambda data, args: bench_styles(data, args.iterations),
+    "render-bytes": lambda data, args: bench_render_bytes(data, args.iterations, args.engine),
+    "micro": lambda data, args: bench_micro(data, args.engine),
+}
+SCENARIOS = [f"{kind}-{size}" for kind in ("generate", "render") for size in SCENARIO_SIZES]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Payslip generator benchmarks')
+    parser.add_argument('--input', type=str, default=None, help='JSON payslip to benchmark with (default: generated)')
+    parser.add_argument('--iterations', type=int, default=200, help='Iterations per measurement')
+    parser.add_argument('--engine', choices=stg.RENDER_ENGINE_NAMES, default='platypus', help='Render engine for render benchmarks')
+    parser.add_argument('--benchmark', action='append', choices=sorted(BENCHMARKS), help='Microbenchmark to run, may be repeated (default: all)')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help=f"End-to-end scenario to run, may be repeated (default: {', '.join(DEFAULT_SCENARIOS)})")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed for generated data')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for render scenarios (default: CPU count)')
+    parser.add_argument('--output', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='Compare against the results stored in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown counted as a regression (default: 0.10)')
+    parser.add_argument('--startup', action='store_true', help='Only check the cold start of the CLIs against their budgets (exit status 1 if over)')
+    parser.add_argument('--run-scenario', type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', type=str, default=None, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        # Child process of bench_scenario
+        result = run_scenario(args.run_scenario, args.seed, args.workers, args.engine)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        sys.exit(0)
+
+    if args.startup:
+        _, over_budget = bench_startup()
+        if over_budget:
+            print(f"{len(over_budget)} CLI(s) over their start-up budget")
+            sys.exit(1)
+        print("All CLIs within their start-up budget")
+        sys.exit(0)
+
+    results = {"micro": {}, "scenarios": {}}
+    data = load_sample(args.input, args.seed)
+    for name in args.benchmark or BENCHMARKS:
+        result = BENCHMARKS[name](data, args)
+        if name == "micro":
+            results["micro"] = result
+        else:
+            results[name] = result
+        print()
+
+    for name in args.scenario or DEFAULT_SCENARIOS:
+        results["scenarios"][name] = bench_scenario(name, args.seed, args.workers, args.engine)
+    print()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
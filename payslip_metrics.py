@@ -0,0 +1,151 @@
+import csv
+import json
+import sys
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (in milliseconds) of the histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+# Stage timings of the work currently running in this process, None when disabled
+_stage_timings = None
+
+
+@contextmanager
+def timed_stage(name):
+    """Add the duration of the block to the current stage timings (if collecting)."""
+    if _stage_timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_timings[name] = _stage_timings.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def collect_stage_timings(enabled=True):
+    """Collect the stage timings of the enclosed work into the yielded dict.
+
+    Yields None and records nothing when ``enabled`` is false.
+    """
+    global _stage_timings
+    _stage_timings = {} if enabled else None
+    try:
+        yield _stage_timings
+    finally:
+        _stage_timings = None
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class MetricsReport:
+    """Aggregate per-file stage timings into per-stage statistics and histograms."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.files = 0
+        self.failed = 0
+        self.stages = {}
+
+    def add_stage(self, name, seconds):
+        self.stages.setdefault(name, []).append(seconds)
+
+    def add(self, timings, failed=False):
+        """Record the stage timings (a dict of seconds per stage) of one file."""
+        self.files += 1
+        if failed:
+            self.failed += 1
+        for name, seconds in (timings or {}).items():
+            self.add_stage(name, seconds)
+
+    def summary(self):
+        """Return the report as a dict."""
+        wall_time = time.perf_counter() - self.start
+        stages = {}
+        for name, values in sorted(self.stages.items()):
+            values = sorted(values)
+            counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for value in values:
+                counts[bisect_left(HISTOGRAM_BUCKETS_MS, value * 1000)] += 1
+            stages[name] = {
+                "count": len(values),
+                "total_s": round(sum(values), 6),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 3),
+                "p90_ms": round(_percentile(values, 0.90) * 1000, 3),
+                "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+                "histogram_ms": {
+                    f"<={bound}": count for bound, count in zip(HISTOGRAM_BUCKETS_MS, counts)
+                } | {f">{HISTOGRAM_BUCKETS_MS[-1]}": counts[-1]},
+            }
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "wall_time_s": round(wall_time, 3),
+            "files_per_second": round(self.files / wall_time, 2) if wall_time > 0 else None,
+            "stages": stages,
+        }
+
+    def write(self, path):
+        """Write the report as JSON, or as one CSV row per stage for a .csv path."""
+        summary = self.summary()
+        if not path.endswith(".csv"):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            return
+
+        buckets = list(next(iter(summary["stages"].values()), {"histogram_ms": {}})["histogram_ms"])
+        columns = ["stage", "count", "total_s", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns + buckets + ["files", "files_per_second"])
+            for name, stage in summary["stages"].items():
+                writer.writerow(
+                    [name] + [stage[column] for column in columns[1:]]
+                    + [stage["histogram_ms"][bucket] for bucket in buckets]
+                    + [summary["files"], summary["files_per_second"]]
+                )
+
+
+class ProgressReporter:
+    """Print a progress line at most once per ``interval`` seconds."""
+
+    def __init__(self, total=None, interval=1.0, stream=None, unit="files"):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.unit = unit
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def update(self, failed=False):
+        """Count one finished item and print progress if the interval has passed."""
+        self.done += 1
+        if failed:
+            self.failed += 1
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self._print(now)
+
+    def finish(self):
+        """Print the final progress line."""
+        self._print(time.perf_counter())
+
+    def _print(self, now):
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        total = f"/{self.total}" if self.total is not None else ""
+        print(
+            f"Progress: {self.done}{total} {self.unit} ({rate:.1f} {self.unit}/s, {self.failed} failed)",
+            file=self.stream,
+            flush=True,
+        )
@@ -0,0 +1,132 @@
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+import salary_template_generator as stg
+import test_data_generator as tdg
+
+# Generated records that may wait for the render stage before generation pauses
+PIPELINE_QUEUE_SIZE = 256
+
+# Put on the queue by the generation stage after the last record
+_END = object()
+
+
+def _generate_stage(records, options):
+    """Put generated records on the queue, followed by _END or the exception that stopped generation."""
+    try:
+        keep_json = options["keep_json"]
+        if keep_json:
+            os.makedirs(keep_json, exist_ok=True)
+        with tdg.JsonlShardWriter(keep_json, compression=options["compression"]) if keep_json else nullcontext() as writer:
+            for record in tdg.iter_payslip_records(
+                options["employees"], options["months"], seed=options["seed"],
+                identity_pool=options["identity_pool"], pool_size=options["pool_size"],
+            ):
+                if writer is not None:
+                    writer.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+                # Blocks while the render stage is PIPELINE_QUEUE_SIZE records behind
+                records.put(record)
+    except BaseException as e:
+        records.put(e)
+    else:
+        records.put(_END)
+
+
+def _queued_records(records):
+    """Yield (label, record) from the queue until the generation stage is done."""
+    count = 0
+    while True:
+        record = records.get()
+        if record is _END:
+            return
+        if isinstance(record, BaseException):
+            raise record
+        count += 1
+        yield f"generated:{count}", record
+
+
+def run_pipeline(num_employees=5, months_per_employee=3, output_dir="payslips", workers=None, engine="platypus",
+                 seed=None, identity_pool=None, pool_size=tdg.IDENTITY_POOL_SIZE,
+                 name_template=stg.DEFAULT_NAME_TEMPLATE, archive=None, metrics=None,
+                 keep_json=None, compression="none", queue_size=PIPELINE_QUEUE_SIZE):
+    """Generate payslip records and render them to PDF in one overlapping pipeline.
+
+    A generation thread puts records on a bounded queue that feeds the render
+    workers directly, so no JSON is written or parsed in between. With
+    ``keep_json`` set to a directory, the generated records are also written
+    there as JSON Lines shards. Returns the render summary plus the wall time
+    and end-to-end records per second.
+    """
+    options = {
+        "employees": num_employees,
+        "months": months_per_employee,
+        "seed": seed,
+        "identity_pool": identity_pool,
+        "pool_size": pool_size,
+        "keep_json": keep_json,
+        "compression": compression,
+    }
+    records = queue.Queue(maxsize=queue_size)
+    start = time.perf_counter()
+    # Daemon thread: if rendering fails, a generation stage blocked on the full queue must not keep the process alive
+    generator = threading.Thread(target=_generate_stage, args=(records, options), name="payslip-generation", daemon=True)
+    generator.start()
+
+    summary = stg.generate_pdfs_from_records(
+        _queued_records(records), output_dir, workers=workers, engine=engine,
+        name_template=name_template, archive=archive, metrics=metrics,
+    )
+    generator.join()
+
+    summary["wall_time_s"] = round(time.perf_counter() - start, 3)
+    summary["records_per_second"] = round(summary["processed"] / summary["wall_time_s"], 2) if summary["wall_time_s"] > 0 else None
+    print(
+        f"Pipeline complete. {summary['processed']} records in {summary['wall_time_s']:.1f}s "
+        f"({summary['records_per_second']} records/s end to end)."
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate payslip test data and render it to PDF in one pipeline')
+    parser.add_argument('--employees', type=int, default=5, help='Number of employees')
+    parser.add_argument('--months', type=int, default=3, help='Number of months per employee')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible output (default: random)')
+    parser.add_argument('--identity-pool', type=str, default=None, help='Sample identities from the pool cached in this file (built if missing)')
+    parser.add_argument('--pool-size', type=int, default=tdg.IDENTITY_POOL_SIZE, help='Entries per identity pool list')
+    parser.add_argument('--output', type=str, default='payslips', help='Output directory for PDFs')
+    parser.add_argument('--name-template', type=str, default=stg.DEFAULT_NAME_TEMPLATE, help='Output file name template (fields: name, personal_nummer, kostenstelle, pay_period, month, year)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of render worker processes (default: CPU count)')
+    parser.add_argument('--engine', choices=stg.RENDER_ENGINE_NAMES, default='platypus', help='Render engine (default: platypus)')
+    parser.add_argument('--archive', type=str, default=None, help='Write PDFs into this .zip/.tar/.tar.gz archive instead of separate files')
+    parser.add_argument('--metrics', type=str, default=None, help='Collect per-stage timings and write a report to this .json or .csv file')
+    parser.add_argument('--keep-json', type=str, default=None, help='Also write the generated records as JSON Lines shards into this directory')
+    parser.add_argument('--compression', choices=sorted(tdg.JSONL_COMPRESSION_SUFFIXES), default='none', help='Compression of the --keep-json shard files')
+    parser.add_argument('--queue-size', type=int, default=PIPELINE_QUEUE_SIZE, help='Generated records that may wait for rendering')
+
+    args = parser.parse_args()
+
+    print(f"Generating and rendering payslips for {args.employees} employees with {args.months} months each...")
+    run_pipeline(
+        num_employees=args.employees,
+        months_per_employee=args.months,
+        output_dir=args.output,
+        workers=args.workers,
+        engine=args.engine,
+        seed=args.seed,
+        identity_pool=args.identity_pool,
+        pool_size=args.pool_size,
+        name_template=args.name_template,
+        archive=args.archive,
+        metrics=args.metrics,
+        keep_json=args.keep_json,
+        compression=args.compression,
+        queue_size=args.queue_size,
+    )
+    print("Done!")
@@ -0,0 +1,1026 @@
+import hashlib
+import io
+import json
+import os
+import zlib
+from functools import lru_cache, partial
+from types import MappingProxyType
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFFormXObject, PDFName, PDFStream, pdfdocEnc
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import (
+    Flowable,
+    Frame,
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from reportlab.platypus.doctemplate import ActionFlowable
+
+from payslip_metrics import timed_stage
+from payslip_ytd import YTD_FIELDS
+
+
+# Bump whenever the payslip layout changes so the manifest re-renders everything
+TEMPLATE_VERSION = "2"
+
+
+_custom_styles = None
+
+
+def create_custom_styles():
+    """Return the shared, read-only custom styles for the payslip document.
+
+    The styles are built on first use and reused for every payslip in the process.
+    """
+    global _custom_styles
+    if _custom_styles is None:
+        _custom_styles = MappingProxyType(_build_custom_styles())
+    return _custom_styles
+
+
+def clear_style_caches():
+    """Drop the shared styles, static paragraphs and compiled template so they are rebuilt on next use."""
+    global _custom_styles, _payslip_template
+    _custom_styles = None
+    _payslip_template = None
+    static_paragraph.cache_clear()
+
+
+@lru_cache(maxsize=256)
+def static_paragraph(text, style):
+    """Return a parsed Paragraph for a static label, shared between payslips."""
+    return Paragraph(text, style)
+
+
+def _build_custom_styles():
+    """Create paragraph and table styles for the payslip document."""
+    styles = getSampleStyleSheet()
+    
+    # Define all custom styles
+    custom_styles = {
+        "title_style": ParagraphStyle(
+            "Title",
+            parent=styles["Heading1"],
+            fontSize=10,
+            alignment=0,
+            spaceAfter=2,
+            leading=10,
+            fontName="Helvetica-Bold",
+        ),
+        "normal_style": ParagraphStyle(
+            "Normal", 
+            parent=styles["Normal"], 
+            fontSize=8, 
+            leading=9
+        ),
+        "bold_style": ParagraphStyle(
+            "Bold", 
+            parent=styles["Normal"], 
+            fontSize=8, 
+            leading=9, 
+            fontName="Helvetica-Bold"
+        ),
+        "header_style": ParagraphStyle(
+            "Header",
+            parent=styles["Heading2"],
+            fontSize=9,
+            textColor=colors.black,
+            spaceAfter=6,
+        ),
+        "small_style": ParagraphStyle(
+            "Small", 
+            parent=styles["Normal"], 
+            fontSize=7, 
+            leading=8
+        ),
+        "micro_style": ParagraphStyle(
+            "Micro",
+            parent=styles["Normal"],
+            fontSize=6,
+            leading=7,
+            spaceBefore=0,
+            spaceAfter=0,
+        ),
+        "notes_style": ParagraphStyle(
+            "Notes",
+            parent=styles["Normal"],
+            fontSize=8,
+            leading=10,
+            alignment="left",
+            textColor=colors.black,
+        ),
+        "centered_style": ParagraphStyle(
+            "Centered",
+            parent=styles["Normal"],
+            fontSize=8,
+            leading=10,
+            alignment=1,  # 1 = center alignment
+            textColor=colors.black,
+        ),
+    }
+    
+    # Styles of the header tables
+    custom_styles["header_title_style"] = ParagraphStyle(
+        "Title",
+        parent=custom_styles["micro_style"],
+        fontSize=8,
+        fontName="Helvetica-Bold",
+    )
+    custom_styles["section_title_style"] = ParagraphStyle("Bold", fontSize=7)
+    
+    # Table styles
+    custom_styles["header_left_table_style"] = TableStyle([("BOTTOMPADDING", (0, 0), (-1, -1), 5)])
+    custom_styles["header_right_table_style"] = TableStyle(
+        [
+            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 0), (-1, -1), 6),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("GRID", (0, 0), (-1, -1), 0.3, colors.black),
+            ("SPAN", (0, 0), (3, 0)),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+            ("TOPPADDING", (0, 0), (-1, -1), 2),
+            ("LINEBELOW", (0, 1), (-1, 1), 0.5, colors.black),
+            ("LINEABOVE", (0, 3), (-1, 3), 0.5, colors.black),
+            # Background styles for alternating rows
+            ("BACKGROUND", (0, 0), (3, 0), colors.lightgrey),
+            ("BACKGROUND", (0, 1), (-1, 1), colors.lightgrey),
+            ("BACKGROUND", (0, 3), (-1, 3), colors.lightgrey),
+            ("BACKGROUND", (0, 5), (-1, 5), colors.lightgrey),
+            ("BACKGROUND", (0, 7), (-1, 7), colors.lightgrey),
+            ("BACKGROUND", (0, 9), (-1, 9), colors.lightgrey),
+        ]
+    )
+    # Custom style to match the borderless look
+    custom_styles["lohnart_table_style"] = TableStyle(
+        [
+            ("BOX", (0, 0), (-1, -1), 1, colors.black),
+            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("TOPPADDING", (0, 0), (-1, -1), 2),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+            ("LEFTPADDING", (0, 0), (-1, -1), 5),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 5),
+            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+            ("ALIGN", (0, 0), (0, -1), "LEFT"),
+            ("BACKGROUND", (0, 0), (6, 0), colors.lightgrey),
+            ("TEXTCOLOR", (0, 1), (0, -1), colors.black),
+            ("FONTNAME", (0, 1), (0, -1), "Helvetica"),
+            ("FONTSIZE", (0, 1), (0, -1), 9),
+            ("LINEAFTER", (4, 0), (5, -1), 0.5, colors.black),
+        ]
+    )
+    custom_styles["header_personal_table_style"] = TableStyle(
+        [
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("TOPPADDING", (0, 0), (-1, -1), 5),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
+        ]
+    )
+    
+    return custom_styles
+
+def create_header_left_table(data, styles, page_count=1):
+    """Create the left part of the header section."""
+    return Table(
+        [
+            [static_paragraph("ENTGELTABRECHNUNG", styles["header_title_style"])],
+            [
+                Paragraph(
+                    f"für den Zeitraum vom {data['abrechnungsdetails']['pay_period'].replace(' / ', '.12.2025 bis 31.')}.2025",
+                    styles["micro_style"],
+                )
+            ],
+            [
+                Paragraph(
+                    f"im Monat {data['abrechnungsdetails']['pay_period']} {data['abrechnungsdetails']['payroll_date']} Seite 1/{page_count}",
+                    styles["micro_style"],
+                )
+            ],
+            [Spacer(1, 0.1 * cm)],
+            [Paragraph(data["arbeitgeber"]["unternehmen"], styles["bold_style"])],
+            [Paragraph(data["arbeitgeber"]["unternehmen_adresse"], styles["micro_style"])],
+            [Spacer(1, 0.2 * cm)],  # Add a small space between addresses
+            [Paragraph(data["arbeitnehmer"]["gender"], styles["bold_style"])],
+            [Paragraph(data["arbeitnehmer"]["name"], styles["normal_style"])],
+            [Paragraph(data["arbeitnehmer"]["adresse"], styles["micro_style"])],
+        ],
+        colWidths=[10 * cm],
+        style=styles["header_left_table_style"],
+    )
+
+
+def create_header_right_table(data):
+    """Create the right part of the header section with personal/organizational data."""
+    return build_template_table(get_payslip_template()["header_right"], data)
+
+
+def format_currency(value):
+    """Format currency values according to German standards."""
+    if value is None:
+        return ""
+    return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+# ---------------------------------------------------------------------------
+# Template spec: the header and salary tables are described as data (see
+# payslip_template.json) and compiled once per process into row skeletons,
+# in which only the variable cells are filled per record.
+# ---------------------------------------------------------------------------
+
+DEFAULT_TEMPLATE_SPEC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "payslip_template.json")
+
+# Cell formatters available to template specs
+TEMPLATE_FORMATTERS = {
+    "text": lambda value: "" if value is None else str(value),
+    "currency": format_currency,
+}
+
+
+def load_template_spec(path):
+    """Load a template spec from a .json or (with PyYAML installed) .yaml/.yml file."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"Reading {path} requires the PyYAML package")
+        return yaml.safe_load(content)
+    return json.loads(content)
+
+
+def _compile_path(path):
+    """Return a getter for a dotted path like 'verdienst.betrag'."""
+    keys = path.split(".")
+    if len(keys) == 2:
+        section, key = keys
+        return lambda data: data[section][key]
+    
+    def get(data):
+        for key in keys:
+            data = data[key]
+        return data
+    return get
+
+
+def _compile_fallback(get, fallback):
+    """Return a getter reading ``fallback`` when the record lacks the path of ``get``."""
+    get_fallback = _compile_path(fallback)
+
+    def get_or_fallback(data):
+        try:
+            return get(data)
+        except (KeyError, TypeError):
+            return get_fallback(data)
+    return get_or_fallback
+
+
+def _compile_value(cell, source):
+    """Return a getter for a {"field"/"item": path, "format": ..., "template": ...} cell.
+    
+    A field cell may name a "fallback" path, read when the record lacks its field.
+    """
+    formatter = TEMPLATE_FORMATTERS[cell.get("format", "text")]
+    template = cell.get("template", "{}")
+    if source == "item":
+        key = cell["item"]
+        get = lambda item: item.get(key)
+    else:
+        get = _compile_path(cell["field"])
+        if "fallback" in cell:
+            get = _compile_fallback(get, cell["fallback"])
+    if template == "{}":
+        return lambda data: formatter(get(data))
+    return lambda data: template.format(formatter(get(data)))
+
+
+def _compile_row(row, styles, source, getters):
+    """Split a spec row into a skeleton of static cells and (column, getter) slots.
+    
+    Cells showing the same value share one getter from ``getters``.
+    """
+    skeleton = []
+    slots = []
+    for column, cell in enumerate(row):
+        if isinstance(cell, str):
+            skeleton.append(cell)
+        elif "paragraph" in cell:
+            skeleton.append(static_paragraph(cell["paragraph"], styles[cell["style"]]))
+        elif source in cell:
+            key = (source, cell[source], cell.get("fallback"), cell.get("format", "text"), cell.get("template", "{}"))
+            if key not in getters:
+                getters[key] = _compile_value(cell, source)
+            skeleton.append("")
+            slots.append((column, getters[key]))
+        else:
+            raise ValueError(f"Invalid template cell: {cell!r}")
+    return skeleton, slots
+
+
+def _fill_row(skeleton, slots, data):
+    row = skeleton.copy()
+    for column, get in slots:
+        row[column] = get(data)
+    return row
+
+
+def compile_template_table(spec, styles, getters):
+    """Compile one table of a template spec.
+    
+    Consecutive fixed rows become a skeleton with the variable cells as slots;
+    an {"items": path, "row": [...], "default": [...]} entry repeats its row for
+    every line item in the record at that path, or for the spec's default items
+    (prebuilt here) when the record has none.
+    """
+    segments = []
+    for row in spec["rows"]:
+        if isinstance(row, dict):
+            skeleton, slots = _compile_row(row["row"], styles, "item", getters)
+            get_items = _compile_path(row["items"])
+            segments.append({
+                "items": get_items,
+                "skeleton": skeleton,
+                "slots": slots,
+                "default_rows": [_fill_row(skeleton, slots, item) for item in row.get("default", [])],
+            })
+            continue
+        skeleton, slots = _compile_row(row, styles, "field", getters)
+        if not segments or "items" in segments[-1]:
+            segments.append({"skeleton": [], "slots": []})
+        segment = segments[-1]
+        segment["slots"].extend((len(segment["skeleton"]), column, get) for column, get in slots)
+        segment["skeleton"].append(skeleton)
+    
+    return {
+        "segments": segments,
+        "col_widths": [width * cm for width in spec["col_widths_cm"]],
+        "style": styles[spec["style"]],
+        "repeat_rows": spec.get("repeat_rows", 0),
+    }
+
+
+def _line_items(segment, data):
+    """Return the record's line items for an items segment, or None if it has none."""
+    try:
+        return segment["items"](data)
+    except (KeyError, TypeError):
+        return None
+
+
+def fill_template_rows(table, data):
+    """Fill the compiled table's skeleton with the values of one record."""
+    rows = []
+    for segment in table["segments"]:
+        if "items" not in segment:
+            first = len(rows)
+            rows.extend([row.copy() for row in segment["skeleton"]])
+            for row, column, get in segment["slots"]:
+                rows[first + row][column] = get(data)
+            continue
+        items = _line_items(segment, data)
+        if items is None:
+            rows.extend([row.copy() for row in segment["default_rows"]])
+        else:
+            rows.extend([_fill_row(segment["skeleton"], segment["slots"], item) for item in items])
+    return rows
+
+
+def build_template_table(table, data):
+    """Build the Table flowable of a compiled template table for one record.
+    
+    Long tables split across pages, repeating their first ``repeat_rows`` rows.
+    """
+    return Table(
+        fill_template_rows(table, data),
+        colWidths=table["col_widths"],
+        style=table["style"],
+        repeatRows=table["repeat_rows"],
+    )
+
+
+def compile_template(spec, styles=None):
+    """Compile a template spec ({table name: table spec}) for the payslip layout."""
+    if styles is None:
+        styles = create_custom_styles()
+    getters = {}
+    template = {name: compile_template_table(table, styles, getters) for name, table in spec.items()}
+    # One getter per distinct record value shown in the tables
+    template["fields"] = [get for (source, *_), get in getters.items() if source == "field"]
+    template["item_segments"] = [
+        segment for name in spec for segment in template[name]["segments"] if "items" in segment
+    ]
+    return template
+
+
+def has_line_items(data):
+    """Return whether a record brings its own line items instead of the template defaults."""
+    return any(_line_items(segment, data) is not None for segment in get_payslip_template()["item_segments"])
+
+
+_template_spec_path = DEFAULT_TEMPLATE_SPEC
+_template_spec_hash = None
+_payslip_template = None
+
+
+def use_template_spec(path=None):
+    """Select the template spec (default: DEFAULT_TEMPLATE_SPEC) for the following payslips."""
+    global _template_spec_path, _template_spec_hash, _payslip_template, _canvas_layout
+    path = path or DEFAULT_TEMPLATE_SPEC
+    if path != _template_spec_path:
+        _template_spec_path = path
+        _template_spec_hash = _payslip_template = _canvas_layout = None
+
+
+def get_payslip_template():
+    """Return the compiled template of the selected spec, compiling it on first use."""
+    global _payslip_template
+    if _payslip_template is None:
+        _payslip_template = compile_template(load_template_spec(_template_spec_path))
+    return _payslip_template
+
+
+def template_version(engine):
+    """Return the template version recorded in the manifest for an engine and the selected spec."""
+    global _template_spec_hash
+    if _template_spec_path == DEFAULT_TEMPLATE_SPEC:
+        return f"{TEMPLATE_VERSION}/{engine}"
+    if _template_spec_hash is None:
+        with open(_template_spec_path, 'rb') as f:
+            _template_spec_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    return f"{TEMPLATE_VERSION}/{engine}/{_template_spec_hash}"
+
+
+def create_lohnart_table(data):
+    """Create the main salary table with all components."""
+    return build_template_table(get_payslip_template()["lohnart"], data)
+
+
+def create_payslip_document(filename):
+    """Set up the document template for a payslip."""
+    doc = SimpleDocTemplate(
+        filename,
+        pagesize=A4,
+        invariant=1,
+        leftMargin=1.5 * cm,
+        rightMargin=1.5 * cm,
+        topMargin=1.0 * cm,
+        bottomMargin=1.0 * cm,
+    )
+    
+    # Adjust bottom margin to ensure content fits
+    doc.bottomMargin = 0.5 * cm
+    return doc
+
+
+def create_payslip_elements(data, styles=None, page_count=1):
+    """Create the list of flowables for one payslip of ``page_count`` pages."""
+    # Get common styles
+    if styles is None:
+        styles = create_custom_styles()
+    elements = []
+
+    # Add vertical Space at the top
+    elements.append(Spacer(1, 0.5 * cm))
+
+    # Create header tables
+    with timed_stage("flowables.header_left"):
+        header_left_table = create_header_left_table(data, styles, page_count)
+    with timed_stage("flowables.header_right"):
+        header_right_table = create_header_right_table(data)
+    
+    # Combine header tables
+    header_personal_table = Table(
+        [[header_left_table, header_right_table]],
+        colWidths=[10 * cm, 10 * cm],
+        rowHeights=[5.5 * cm],
+        style=styles["header_personal_table_style"],
+    )
+    elements.append(header_personal_table)
+
+    # Add space after the header
+    elements.append(Spacer(1, 1.1 * cm))
+
+    # Add main salary table
+    with timed_stage("flowables.lohnart"):
+        lohnart_table = create_lohnart_table(data)
+    elements.append(lohnart_table)
+
+    # Add footer section
+    elements.append(Spacer(1, 1 * cm))
+    
+    # Footer text paragraphs
+    elements.append(
+        static_paragraph(
+            "Wenn du Fragen zu deiner Verdienstabrechnung hast, dann nutze bitte das HR Serviceportal. Dies findest du im Self-Service-Portal in<br/>"
+            "Confluence unter 'Viel genutzt'- Human Resources.",
+            styles["centered_style"],
+        )
+    )
+    elements.append(Spacer(1, 0.5 * cm))
+    elements.append(
+        static_paragraph(
+            "Bescheinigung gemäß § 108 Absatz 3 Satz 1 Gewerbeordnung. Bitte sorgfältig aufbewahren.<br/>"
+            "Kennzeichen: (E)inmalzahlung, (L)ohnsteuer-, (S)V-pflichtig, (G)esamtbrutto",
+            styles["centered_style"],
+        )
+    )
+
+    elements.append(PageBreak())
+
+    return elements
+
+
+def _render_target(filename):
+    """Return what to render into: a buffer for file paths, else the file-like target itself."""
+    return io.BytesIO() if isinstance(filename, (str, os.PathLike)) else filename
+
+
+def _write_rendered(filename, target):
+    """Write a PDF rendered into a buffer out to its file path."""
+    if target is not filename:
+        with timed_stage("write"):
+            with open(filename, 'wb') as f:
+                f.write(target.getvalue())
+
+
+def create_payslip(filename, data):
+    """Create a PDF payslip with the given data."""
+    target = _render_target(filename)
+    _build_numbered_payslips(target, [data])
+    _write_rendered(filename, target)
+
+
+class _PageMarker(Flowable):
+    """Zero-size flowable that records the page it is drawn on."""
+
+    _ZEROSIZE = True
+
+    def __init__(self, entry):
+        super().__init__()
+        self.entry = entry
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.entry["page"] = self.canv.getPageNumber()
+
+
+def _page_ranges(first_pages, page_total):
+    """Turn the first page (1-based) of each payslip into (page_offset, page_count) pairs."""
+    ends = first_pages[1:] + [page_total + 1]
+    return [(first - 1, end - first) for first, end in zip(first_pages, ends)]
+
+
+def _draw_page_label(page_labels, canv, doc):
+    """Draw the "Seite n/N" label of a payslip page after the first (an onPage callback)."""
+    label = page_labels.get(canv.getPageNumber())
+    if label is not None:
+        canv.saveState()
+        canv.setFont("Helvetica", 6)
+        canv.drawRightString(doc.pagesize[0] - doc.rightMargin, doc.pagesize[1] - doc.topMargin, label)
+        canv.restoreState()
+
+
+def _build_payslips(target, records, page_ranges=None):
+    """Lay out payslips into one document with a single doc.build.
+    
+    Returns a (page_offset, page_count) pair per record. Given the page ranges
+    of an earlier pass, every payslip shows its page count in the header and
+    its further pages are numbered.
+    """
+    doc = create_payslip_document(target)
+    styles = create_custom_styles()
+    
+    entries = []
+    elements = []
+    page_labels = {}
+    with timed_stage("flowables"):
+        for index, data in enumerate(records):
+            page_count = 1
+            if page_ranges is not None:
+                page_offset, page_count = page_ranges[index]
+                for number in range(2, page_count + 1):
+                    page_labels[page_offset + number] = f"Seite {number}/{page_count}"
+            # A single payslip starts on the first page and needs no marker
+            if len(records) > 1:
+                entry = {}
+                entries.append(entry)
+                elements.append(_PageMarker(entry))
+            elements.extend(create_payslip_elements(data, styles, page_count))
+    
+    with timed_stage("build"):
+        doc.build(elements, onLaterPages=partial(_draw_page_label, page_labels))
+    return _page_ranges([entry["page"] for entry in entries] or [1], doc.page)
+
+
+def _build_numbered_payslips(target, records):
+    """Build payslips into target, numbering the pages of those longer than one page.
+    
+    Only line items can make a payslip run over a page; records with any are
+    laid out once to count their pages, and again if one of them needs more
+    than one.
+    """
+    if not any(has_line_items(data) for data in records):
+        return _build_payslips(target, records)
+    scratch = io.BytesIO()
+    page_ranges = _build_payslips(scratch, records)
+    if all(page_count == 1 for _, page_count in page_ranges):
+        target.write(scratch.getvalue())
+        return page_ranges
+    return _build_payslips(target, records, page_ranges)
+
+
+def create_payslip_bundle(filename, records):
+    """Create one PDF containing a payslip for every record, with a single doc.build.
+    
+    Returns a (page_offset, page_count) pair per record.
+    """
+    target = _render_target(filename)
+    page_ranges = _build_numbered_payslips(target, records)
+    _write_rendered(filename, target)
+    return page_ranges
+
+
+def create_annual_summary(filename, annual):
+    """Create a PDF with the annual summary of one employee (see iter_annual_summaries)."""
+    target = _render_target(filename)
+    doc = create_payslip_document(target)
+    styles = create_custom_styles()
+    year = annual["year"]
+    
+    with timed_stage("flowables"):
+        header_left_table = Table(
+            [
+                [static_paragraph("JAHRESÜBERSICHT", styles["header_title_style"])],
+                [Paragraph(f"für den Zeitraum vom 01.01.{year} bis 31.12.{year}", styles["micro_style"])],
+                [Spacer(1, 0.1 * cm)],
+                [Paragraph(annual["arbeitgeber"]["unternehmen"], styles["bold_style"])],
+                [Paragraph(annual["arbeitgeber"]["unternehmen_adresse"], styles["micro_style"])],
+                [Spacer(1, 0.2 * cm)],
+                [Paragraph(annual["arbeitnehmer"]["gender"], styles["bold_style"])],
+                [Paragraph(annual["arbeitnehmer"]["name"], styles["normal_style"])],
+                [Paragraph(annual["arbeitnehmer"]["adresse"], styles["micro_style"])],
+            ],
+            colWidths=[10 * cm],
+            style=styles["header_left_table_style"],
+        )
+        header_personal_table = Table(
+            [[header_left_table, create_header_right_table(annual)]],
+            colWidths=[10 * cm, 10 * cm],
+            rowHeights=[5.5 * cm],
+            style=styles["header_personal_table_style"],
+        )
+        
+        # One row per month, then the annual totals
+        rows = [["Monat"] + annual["columns"]]
+        for month, values in sorted(annual["months"].items()):
+            rows.append([f"{month:02d} / {year}"] + [format_currency(value / 100) for value in values])
+        rows.append(
+            [static_paragraph("<b>Summe:</b>", styles["bold_style"])]
+            + [format_currency(total / 100) for total in annual["totals"]]
+        )
+        summary_table = Table(
+            rows,
+            colWidths=[3 * cm] + [2.25 * cm] * len(annual["columns"]),
+            style=styles["lohnart_table_style"],
+            repeatRows=1,
+        )
+        
+        elements = [
+            Spacer(1, 0.5 * cm),
+            header_personal_table,
+            Spacer(1, 1.1 * cm),
+            summary_table,
+            Spacer(1, 1 * cm),
+            Paragraph(
+                f"Summe aus {len(annual['months'])} Entgeltabrechnungen des Jahres {year}. Bitte sorgfältig aufbewahren.",
+                styles["centered_style"],
+            ),
+        ]
+    
+    with timed_stage("build"):
+        doc.build(elements)
+    _write_rendered(filename, target)
+
+
+# ---------------------------------------------------------------------------
+# Canvas engine: the fixed payslip layout is measured once with the platypus
+# builders above, the static parts are kept as a PDF form and only the
+# variable strings are drawn per document.
+# ---------------------------------------------------------------------------
+
+STATIC_FORM_NAME = "payslip_static"
+
+
+def _field(section, key, template="{}"):
+    """Return a getter for a plain text field."""
+    return lambda data: template.format(data[section][key])
+
+
+# Variable strings of the left header, in the form create_header_left_table renders them
+HEADER_LEFT_FIELDS = [
+    lambda data: f"für den Zeitraum vom {data['abrechnungsdetails']['pay_period'].replace(' / ', '.12.2025 bis 31.')}.2025",
+    lambda data: f"im Monat {data['abrechnungsdetails']['pay_period']} {data['abrechnungsdetails']['payroll_date']} Seite 1/1",
+    _field("arbeitgeber", "unternehmen"),
+    _field("arbeitgeber", "unternehmen_adresse"),
+    _field("arbeitnehmer", "gender"),
+    _field("arbeitnehmer", "name"),
+    _field("arbeitnehmer", "adresse"),
+]
+
+
+def canvas_fields():
+    """Return every variable string getter of the layout: the left header, then the template tables."""
+    return HEADER_LEFT_FIELDS + get_payslip_template()["fields"]
+
+
+# Record used to measure the layout. Every value is distinct, so each rendered
+# string can be traced back to the field it came from.
+_LAYOUT_PROBE = {
+    "arbeitgeber": {
+        "unternehmen": "unternehmen",
+        "unternehmen_adresse": "unternehmen_adresse",
+        "kostenstelle": "kostenstelle",
+    },
+    "arbeitnehmer": {
+        "gender": "gender",
+        "name": "name",
+        "adresse": "adresse",
+        "personal_nummer": "personal_nummer",
+        "geburtsdatum": "geburtsdatum",
+        "steuerklasse": "steuerklasse",
+        "eintrittsdatum": "eintrittsdatum",
+        "sv_nummer": "sv_nummer",
+        "krankenkasse": "krankenkasse",
+        "beitragsgruppenschluessel": "beitragsgruppenschluessel",
+        "steuer_id": "steuer_id",
+        "kv_prozentsatz": "kv_prozentsatz",
+        "rv_prozentsatz": "rv_prozentsatz",
+        "av_prozentsatz": "av_prozentsatz",
+        "pv_prozentsatz": "pv_prozentsatz",
+    },
+    "abrechnungsdetails": {"pay_period": "01 / 2025", "payroll_date": "payroll_date"},
+    "verdienst": {"lohn_bezeichnung": "lohn_bezeichnung", "betrag": 1001.01, "gesamt_brutto": 1002.02},
+    "steuern_sozialversicherung": {
+        "steuer_brutto": 1003.03,
+        "kv_brutto": 1004.04,
+        "rv_brutto": 1005.05,
+        "av_brutto": 1006.06,
+        "lohnsteuer": 1007.07,
+        "kv_beitrag": 1008.08,
+        "rv_beitrag": 1009.09,
+        "av_beitrag": 1010.10,
+        "pv_beitrag": 1011.11,
+        "netto_verdienst": 1012.12,
+    },
+    "zahlungsdetails": {
+        "sv_ag_anteil": 1013.13,
+        "auszahlungsbetrag": 1014.14,
+        "bank_employee": "bank_employee",
+        "bankleitzahl": "bankleitzahl",
+        "Kto": "Kto",
+        "iban_employee": "iban_employee",
+    },
+    "jahresübersicht": {field: 1101.01 + index * 1.01 for index, field in enumerate(YTD_FIELDS)},
+}
+
+
+class _LayoutRecorder(Canvas):
+    """Canvas that records where variable strings go instead of drawing them."""
+
+    def __init__(self, *args, field_texts, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field_texts = field_texts
+        self.placements = []
+        self.paragraph_slots = []
+
+    def _record(self, method, x, y, text):
+        a, b, c, d, e, f = self._currentMatrix
+        self.placements.append((
+            self.field_texts[text],
+            method,
+            a * x + c * y + e,
+            b * x + d * y + f,
+            self._fontname,
+            self._fontsize,
+            self._fillColorObj,
+        ))
+
+    def drawString(self, x, y, text, *args, **kwargs):
+        if text in self.field_texts:
+            return self._record("drawString", x, y, text)
+        return super().drawString(x, y, text, *args, **kwargs)
+
+    def drawRightString(self, x, y, text, *args, **kwargs):
+        if text in self.field_texts:
+            return self._record("drawRightString", x, y, text)
+        return super().drawRightString(x, y, text, *args, **kwargs)
+
+    def drawCentredString(self, x, y, text, *args, **kwargs):
+        if text in self.field_texts:
+            return self._record("drawCentredString", x, y, text)
+        return super().drawCentredString(x, y, text, *args, **kwargs)
+
+
+def _record_paragraph(paragraph, canv, x, y, _sW=0):
+    """Record a variable one-line Paragraph as a plain string placement."""
+    style = paragraph.style
+    if len(paragraph.blPara.lines) != 1:
+        raise ValueError(f"Layout field does not fit on one line: {paragraph.text!r}")
+    canv.setFont(style.fontName, style.fontSize)
+    canv.setFillColor(style.textColor)
+    canv._record("drawString", x + style.leftIndent, y + paragraph.height - style.fontSize, paragraph.text)
+    # A longer value would wrap in platypus; remember the width it has
+    canv.paragraph_slots.append((
+        canv.field_texts[paragraph.text],
+        style.fontName,
+        style.fontSize,
+        paragraph.width - style.leftIndent - style.rightIndent,
+    ))
+
+
+def compute_canvas_layout():
+    """Measure the payslip layout once and capture its static parts.
+
+    Returns a dict with the compressed content stream of the static form, the
+    fonts it references, the field getters (see ``canvas_fields``), the
+    placement of every field and the width of every field that platypus renders
+    as a Paragraph. Line items are measured with the template defaults.
+    """
+    fields = canvas_fields()
+    field_texts = {getter(_LAYOUT_PROBE): index for index, getter in enumerate(fields)}
+    recorder = _LayoutRecorder(io.BytesIO(), pagesize=A4, field_texts=field_texts)
+    
+    # Lay out the probe record exactly like SimpleDocTemplate would
+    doc = create_payslip_document(None)
+    doc._calc()
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+    elements = create_payslip_elements(_LAYOUT_PROBE)
+    
+    # Variable paragraphs are recorded rather than drawn
+    header_left_table = elements[1]._cellvalues[0][0]
+    for row in header_left_table._cellvalues:
+        for cell in row:
+            if isinstance(cell, Paragraph) and cell.text in field_texts:
+                cell.drawOn = partial(_record_paragraph, cell)
+    
+    recorder.beginForm(STATIC_FORM_NAME)
+    for flowable in elements:
+        if not isinstance(flowable, ActionFlowable):
+            frame.add(flowable, recorder)
+    # Compress the form stream once; documents embed the encoded bytes as they are
+    form_stream = zlib.compress(pdfdocEnc("\n".join([recorder._preamble] + recorder._code)))
+    recorder.endForm()
+    
+    found = {placement[0] for placement in recorder.placements}
+    missing = [index for index in range(len(fields)) if index not in found]
+    if missing:
+        raise ValueError(f"Layout fields not found in the payslip layout: {missing}")
+    
+    fonts = sorted(recorder._doc.fontMapping.items(), key=lambda item: int(item[1].lstrip("/F")))
+    return {
+        "form_stream": form_stream,
+        "fonts": fonts,
+        "fields": fields,
+        "placements": recorder.placements,
+        "paragraph_slots": recorder.paragraph_slots,
+    }
+
+
+_canvas_layout = None
+
+
+def get_canvas_layout():
+    """Return the canvas layout, computing it on first use."""
+    global _canvas_layout
+    if _canvas_layout is None:
+        _canvas_layout = compute_canvas_layout()
+    return _canvas_layout
+
+
+def fits_canvas_layout(data, layout=None):
+    """Return whether the canvas layout renders data exactly like platypus.
+
+    Every field is drawn as a single line, so values with line breaks need
+    the platypus engine, and so do header paragraph values that platypus would
+    wrap or that hold Paragraph markup.
+    """
+    if layout is None:
+        layout = get_canvas_layout()
+    values = [getter(data) for getter in layout["fields"]]
+    if any("\n" in text for text in values):
+        return False
+    for index, font_name, font_size, width in layout["paragraph_slots"]:
+        text = values[index]
+        # "<" starts a tag and "&...;" an entity in Paragraph markup
+        if "<" in text or ("&" in text and ";" in text) or stringWidth(text, font_name, font_size) > width:
+            return False
+    return True
+
+
+def draw_payslip_page(canv, data, layout=None):
+    """Draw one payslip page on a canvas using the precomputed layout."""
+    if layout is None:
+        layout = get_canvas_layout()
+    
+    # Register the static form once per document
+    if not canv._doc.hasForm(STATIC_FORM_NAME):
+        for font_name, internal_name in layout["fonts"]:
+            if canv._doc.getInternalFontName(font_name) != internal_name:
+                raise ValueError(f"Font {font_name} cannot be mapped to {internal_name} in this document")
+        form = PDFFormXObject(0, 0, *canv._pagesize)
+        form.Contents = PDFStream(content=layout["form_stream"])
+        form.Contents.dictionary["Filter"] = PDFArray([PDFName("FlateDecode")])
+        canv._doc.addForm(STATIC_FORM_NAME, form)
+    
+    # The values go below the static form, as platypus draws table grids over cell text
+    values = [getter(data) for getter in layout["fields"]]
+    current_font = current_color = None
+    canv.saveState()
+    for index, method, x, y, font_name, font_size, color in layout["placements"]:
+        text = values[index]
+        if not text:
+            continue
+        if current_font != (font_name, font_size):
+            current_font = (font_name, font_size)
+            canv.setFont(font_name, font_size)
+        if current_color is not color:
+            current_color = color
+            canv.setFillColor(color)
+        getattr(canv, method)(x, y, text)
+    canv.restoreState()
+    canv.doForm(STATIC_FORM_NAME)
+    canv.showPage()
+
+
+def create_payslip_canvas(filename, data):
+    """Create a PDF payslip with the canvas engine.
+    
+    The precomputed layout has the template's default line items and a fixed
+    width for every value, so records with their own line items or with values
+    that do not fit (see fits_canvas_layout) are rendered with the platypus
+    engine instead.
+    """
+    if has_line_items(data) or not fits_canvas_layout(data):
+        return create_payslip(filename, data)
+    target = _render_target(filename)
+    canv = Canvas(target, pagesize=A4, invariant=1)
+    with timed_stage("draw"):
+        draw_payslip_page(canv, data)
+    with timed_stage("build"):
+        canv.save()
+    _write_rendered(filename, target)
+
+
+def create_payslip_bundle_canvas(filename, records):
+    """Create one PDF containing a payslip for every record with the canvas engine.
+    
+    The static form is written once and shared by all pages. Bundles with
+    records that the layout does not fit (see create_payslip_canvas) are
+    rendered with the platypus engine.
+    """
+    layout = get_canvas_layout()
+    if any(has_line_items(data) or not fits_canvas_layout(data, layout) for data in records):
+        return create_payslip_bundle(filename, records)
+    target = _render_target(filename)
+    canv = Canvas(target, pagesize=A4, invariant=1)
+    with timed_stage("draw"):
+        for data in records:
+            draw_payslip_page(canv, data, layout)
+    with timed_stage("build"):
+        canv.save()
+    _write_rendered(filename, target)
+    return [(page_offset, 1) for page_offset in range(len(records))]
+
+
+RENDER_ENGINES = {
+    "platypus": create_payslip,
+    "canvas": create_payslip_canvas,
+}
+
+BUNDLE_ENGINES = {
+    "platypus": create_payslip_bundle,
+    "canvas": create_payslip_bundle_canvas,
+}
+
+
+def render_payslip(data, target, engine="platypus"):
+    """Render a payslip into a writable binary file-like object."""
+    RENDER_ENGINES[engine](target, data)
+
+
+def render_payslip_bytes(data, engine="platypus"):
+    """Render a payslip in memory and return the PDF bytes, without temp files."""
+    buffer = io.BytesIO()
+    render_payslip(data, buffer, engine)
+    return buffer.getvalue()
@@ -0,0 +1,216 @@
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool, TimeoutError
+
+from salary_template_generator import PayslipValidationError, check_payslip
+
+
+class ServiceBusy(Exception):
+    """Raised when the request queue is full."""
+
+
+def _warm_up(engine):
+    """Import the renderer and build styles/layout once per worker process."""
+    global payslip_render
+    import payslip_render
+
+    payslip_render.create_custom_styles()
+    if engine == "canvas":
+        payslip_render.get_canvas_layout()
+
+
+def _render(data, engine):
+    return payslip_render.render_payslip_bytes(data, engine)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class PayslipService:
+    """Render payslips on a pool of pre-warmed worker processes.
+
+    At most ``workers + max_queue`` requests are accepted at a time; further
+    requests are rejected with ServiceBusy. Records are checked against the
+    payslip schema before they are sent to a worker, and invalid ones raise
+    PayslipValidationError. A request that takes longer than
+    ``timeout`` seconds raises TimeoutError, but keeps its slot until the worker
+    has finished with it.
+    """
+
+    def __init__(self, workers=None, max_queue=32, timeout=10.0, engine="platypus"):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.engine = engine
+        self._pool = Pool(self.workers, initializer=_warm_up, initargs=(engine,))
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=10000)
+        self._counters = {"requests": 0, "succeeded": 0, "invalid": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _release(self, _result=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def render(self, data):
+        """Render one payslip record and return the PDF bytes."""
+        self._count("requests")
+        try:
+            check_payslip(data)
+        except PayslipValidationError:
+            self._count("invalid")
+            raise
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise ServiceBusy("Request queue is full")
+        with self._lock:
+            self._in_flight += 1
+
+        start = time.perf_counter()
+        pending = self._pool.apply_async(
+            _render, (data, self.engine), callback=self._release, error_callback=self._release
+        )
+        try:
+            pdf_bytes = pending.get(self.timeout)
+        except TimeoutError:
+            self._count("timeouts")
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        self._count("succeeded")
+        return pdf_bytes
+
+    def metrics(self):
+        """Return request counters, queue depth and p50/p99 latency in milliseconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self._counters)
+            metrics["in_flight"] = self._in_flight
+            metrics["queue_depth"] = max(0, self._in_flight - self.workers)
+        metrics["workers"] = self.workers
+        for name, fraction in (("p50_ms", 0.50), ("p99_ms", 0.99)):
+            value = _percentile(latencies, fraction)
+            metrics[name] = None if value is None else round(value * 1000, 3)
+        return metrics
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+
+class PayslipRequestHandler(BaseHTTPRequestHandler):
+    """POST /payslip renders the JSON body; GET /metrics and GET /health report status."""
+
+    service = None
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/payslip":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        try:
+            pdf_bytes = self.service.render(data)
+        except PayslipValidationError as e:
+            self._send_json(400, {"error": "Invalid payslip", "errors": e.errors})
+        except ServiceBusy as e:
+            self._send_json(503, {"error": str(e)}, headers={"Retry-After": "1"})
+        except TimeoutError:
+            self._send_json(504, {"error": f"Rendering took longer than {self.service.timeout}s"})
+        except Exception as e:
+            self._send_json(422, {"error": f"Could not render payslip: {e}"})
+        else:
+            self._send(200, pdf_bytes, content_type="application/pdf")
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(service, host="127.0.0.1", port=8080, socket_path=None):
+    """Serve the payslip service over HTTP on host:port, or on a Unix socket."""
+    handler = type("Handler", (PayslipRequestHandler,), {"service": service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+        print(f"Serving payslips on unix socket {socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        print(f"Serving payslips on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve payslip PDFs from a pool of warm worker processes')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--socket', type=str, default=None, help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--max-queue', type=int, default=32, help='Requests that may wait for a worker before new ones are rejected')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Request timeout in seconds')
+    parser.add_argument('--engine', choices=['canvas', 'platypus'], default='platypus', help='Render engine (default: platypus)')
+
+    args = parser.parse_args()
+
+    serve(
+        PayslipService(workers=args.workers, max_queue=args.max_queue, timeout=args.timeout, engine=args.engine),
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+    )
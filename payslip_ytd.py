@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+
+YTD_STATE_VERSION = 2
+
+# Year-to-date figures in the jahresübersicht section, and the monthly field each one sums
+YTD_FIELDS = {
+    "gesamt_jahres_brutto": ("verdienst", "gesamt_brutto"),
+    "gesamt_steuer_brutto": ("steuern_sozialversicherung", "steuer_brutto"),
+    "lohnsteuer": ("steuern_sozialversicherung", "lohnsteuer"),
+    "sv_brutto": ("steuern_sozialversicherung", "rv_brutto"),
+    "kv_beitrag": ("steuern_sozialversicherung", "kv_beitrag"),
+    "rv_beitrag": ("steuern_sozialversicherung", "rv_beitrag"),
+    "av_beitrag": ("steuern_sozialversicherung", "av_beitrag"),
+    "pv_beitrag": ("steuern_sozialversicherung", "pv_beitrag"),
+    "kv_brutto": ("steuern_sozialversicherung", "kv_brutto"),
+    "av_brutto": ("steuern_sozialversicherung", "av_brutto"),
+    "sv_ag_anteil": ("zahlungsdetails", "sv_ag_anteil"),
+}
+
+
+def _open_state(path, mode, compressed):
+    return gzip.open(path, mode + 't', encoding='utf-8') if compressed else open(path, mode, encoding='utf-8')
+
+
+class YearToDate:
+    """Running year-to-date totals per employee and year.
+
+    Employees are told apart by personal_nummer and SV-Nummer together, so two
+    people who were given the same personal number never share totals.
+
+    For every employee and year the state keeps the figures of each month seen
+    and the running totals through the last month of an unbroken run from
+    January, all in cents. Adding the next month in order only adds it to the
+    running totals. A month that is re-run with corrected figures replaces the
+    old ones (its difference is applied to the running totals), and the totals
+    through a month before the last one are summed from at most 12 stored
+    months, so months may arrive in any order.
+
+    With ``path`` set, the state is loaded from that file (gzipped for a .gz
+    path) and written back by save().
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.fields = list(YTD_FIELDS)
+        self._sources = list(YTD_FIELDS.values())
+        self.employees = {}
+        if path is not None and os.path.exists(path):
+            with _open_state(path, 'r', path.endswith(".gz")) as f:
+                state = json.load(f)
+            if (state.get("version"), state.get("fields")) == (YTD_STATE_VERSION, self.fields):
+                self.employees = state["employees"]
+            else:
+                print(f"Ignoring year-to-date state {path} written by a different version")
+
+    def add(self, data):
+        """Record the figures of one payslip and return its year-to-date totals.
+
+        Returns a dict with the jahresübersicht figures (see YTD_FIELDS) from
+        January through the payslip's month.
+        """
+        month, year = (part.strip() for part in data["abrechnungsdetails"]["pay_period"].split("/"))
+        month = int(month)
+        values = [round((data[section][key] or 0) * 100) for section, key in self._sources]
+
+        employee = f"{data['arbeitnehmer']['personal_nummer']}/{data['arbeitnehmer']['sv_nummer']}"
+        years = self.employees.setdefault(employee, {})
+        entry = years.get(year)
+        if entry is None:
+            entry = years[year] = {"through": 0, "totals": [0] * len(values), "months": {}}
+        months = entry["months"]
+        previous = months.get(f"{month:02d}")
+        months[f"{month:02d}"] = values
+
+        if month <= entry["through"]:
+            # A correction of a month that is already in the running totals
+            entry["totals"] = [total + value - old for total, value, old in zip(entry["totals"], values, previous)]
+        # Extend the running totals over the next months in order, if present
+        while f"{entry['through'] + 1:02d}" in months:
+            entry["through"] += 1
+            entry["totals"] = [total + value for total, value in zip(entry["totals"], months[f"{entry['through']:02d}"])]
+
+        if month == entry["through"]:
+            totals = entry["totals"]
+        else:
+            totals = [0] * len(values)
+            for number in range(1, month + 1):
+                month_values = months.get(f"{number:02d}")
+                if month_values is not None:
+                    totals = [total + value for total, value in zip(totals, month_values)]
+        return {field: total / 100 for field, total in zip(self.fields, totals)}
+
+    def save(self):
+        """Atomically write the state to its path (if it has one)."""
+        if self.path is None:
+            return
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with _open_state(temp_path, 'w', self.path.endswith(".gz")) as f:
+            json.dump(
+                {"version": YTD_STATE_VERSION, "fields": self.fields, "employees": self.employees},
+                f, separators=(',', ':'),
+            )
+        os.replace(temp_path, self.path)
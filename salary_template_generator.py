@@ -1,529 +1,1351 @@
 import json
 import os
 import glob
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import cm
-from reportlab.platypus import (
-    PageBreak,
-    Paragraph,
-    SimpleDocTemplate,
-    Spacer,
-    Table,
-    TableStyle,
-)
-
-
-def generate_pdfs_from_json(input_dir, output_dir=None):
-    """Generate PDF payslips from JSON data files."""
-    # If no output directory specified, use the input directory
-    if output_dir is None:
-        output_dir = input_dir
+import re
+import gzip
+import hashlib
+import queue
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+import io
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from payslip_metrics import MetricsReport, ProgressReporter, collect_stage_timings, timed_stage
+from payslip_ytd import YTD_FIELDS, YearToDate
+
+
+# Writer stage: threads writing rendered PDFs, and retries (with exponential backoff) per failed write
+WRITE_THREADS = 8
+WRITE_RETRIES = 3
+WRITE_RETRY_DELAY = 0.2
+
+MANIFEST_FILENAME = "payslip_manifest.json"
+JOURNAL_FILENAME = "payslip_journal.jsonl"
+
+# Journal entries are written out once this many are pending, or after this many seconds
+JOURNAL_BATCH_SIZE = 256
+JOURNAL_FLUSH_INTERVAL = 1.0
+
+
+def _sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _file_sha256(path):
+    with open(path, 'rb') as f:
+        return _sha256(f.read())
+
+
+def _manifest_filename(output_dir, shard=None, filename=MANIFEST_FILENAME):
+    """Return the manifest (or journal) path; each shard keeps its own so machines sharing an output directory do not clash."""
+    if shard is None:
+        return os.path.join(output_dir, filename)
+    name, extension = os.path.splitext(filename)
+    return os.path.join(output_dir, f"{name}.shard-{shard[0]}-of-{shard[1]}{extension}")
+
+
+def _is_bookkeeping_file(name):
+    """Return whether a file name is a manifest or journal this module writes (for any shard), not an input."""
+    for filename in (MANIFEST_FILENAME, JOURNAL_FILENAME):
+        stem, extension = os.path.splitext(filename)
+        if name == filename or (name.startswith(stem + ".shard-") and name.endswith(extension)):
+            return True
+    return False
+
+
+def load_manifest(output_dir, shard=None):
+    """Load the build manifest of an output directory (empty if there is none)."""
+    manifest_filename = _manifest_filename(output_dir, shard)
+    if not os.path.exists(manifest_filename):
+        return {}
+    with open(manifest_filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest, shard=None):
+    """Atomically write the build manifest of an output directory."""
+    manifest_filename = _manifest_filename(output_dir, shard)
+    temp_filename = manifest_filename + ".tmp"
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temp_filename, manifest_filename)
+
+
+def load_journal(output_dir, shard=None):
+    """Return the latest journal entry per input of an output directory (empty if there is no journal)."""
+    journal_filename = _manifest_filename(output_dir, shard, JOURNAL_FILENAME)
+    entries = {}
+    if not os.path.exists(journal_filename):
+        return entries
+    with open(journal_filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A run that was killed mid-write can leave a torn last line
+                continue
+            entries[entry["input"]] = entry
+    return entries
+
+
+class RunJournal:
+    """Append-only checkpoint log of the outcome of each input of a run.
     
-    # Make sure output directory exists
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    Every input is recorded as "done" (with its manifest entry) or "failed"
+    (with the error); the latest entry for an input wins. Entries are buffered
+    and written, flushed and synced in batches of ``batch_size`` or every
+    ``flush_interval`` seconds, so a killed run loses at most one batch.
+    """
+
+    def __init__(self, path, append=False, batch_size=JOURNAL_BATCH_SIZE, flush_interval=JOURNAL_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def record(self, input_path, status, error=None, manifest_entry=None):
+        """Record the outcome of one input."""
+        entry = {"input": input_path, "status": status}
+        if error is not None:
+            entry["error"] = error
+        if manifest_entry is not None:
+            entry["manifest_entry"] = manifest_entry
+        self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the pending entries to disk."""
+        if self._pending:
+            self._file.write("".join(self._pending))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveWriter:
+    """Append files to a ZIP or TAR archive from a single writer thread.
     
-    # Find all JSON files in the input directory (including subdirectories)
-    json_files = []
-    for root, dirs, files in os.walk(input_dir):
-        for file in files:
-            if file.endswith('.json') and 'payslip_' in file:
-                json_files.append(os.path.join(root, file))
+    ``add`` may be called from any thread; files are queued (blocking once
+    ``max_pending`` files are waiting) and written in the order they were added.
+    The archive type follows the extension: .zip, .tar, .tar.gz/.tgz. A failed
+    write aborts the archive: ``add`` and ``close`` raise the error.
+    """
+
+    def __init__(self, path, max_pending=64):
+        self.path = path
+        if path.endswith(".zip"):
+            # PDF content streams are already compressed
+            self._archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+        elif path.endswith((".tar.gz", ".tgz")):
+            self._archive = tarfile.open(path, "w|gz")
+        elif path.endswith(".tar"):
+            self._archive = tarfile.open(path, "w|")
+        else:
+            raise ValueError(f"Unsupported archive type: {path}")
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        # Same interface as FileWriter; an archive has no per-file failures
+        self.failed = []
+        self.write_times = []
+        self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, name, content, label=None):
+        """Queue content (bytes) to be stored under name (a relative path)."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((name.replace(os.sep, "/"), content))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                continue
+            start = time.perf_counter()
+            try:
+                self._write(*item)
+            except Exception as e:
+                self._error = e
+            self.write_times.append(time.perf_counter() - start)
+
+    def _write(self, name, content):
+        # Fixed timestamps keep archives of deterministic PDFs deterministic too
+        if isinstance(self._archive, zipfile.ZipFile):
+            self._archive.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), content)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            self._archive.addfile(info, io.BytesIO(content))
+
+    def close(self):
+        """Write the remaining files and close the archive."""
+        self._queue.put(None)
+        self._thread.join()
+        self._archive.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FileWriter:
+    """Write files below a directory from a pool of writer threads.
     
-    # Process each JSON file
-    for json_file in json_files:
+    Rendering never waits on storage: ``add`` queues the content and returns,
+    blocking only once ``max_pending`` files are waiting. Each file is written
+    to a temporary name and renamed into place, so readers never see a partial
+    PDF. A failed write is retried ``retries`` times with exponential backoff
+    starting at ``retry_delay`` seconds; files that still fail are listed in
+    ``failed`` as (label, path, error).
+    """
+
+    def __init__(self, output_dir, threads=WRITE_THREADS, max_pending=64, retries=WRITE_RETRIES, retry_delay=WRITE_RETRY_DELAY):
+        self.output_dir = output_dir
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.failed = []
+        self.write_times = []
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="file-writer")
+
+    def add(self, name, content, label=None):
+        """Queue content (bytes) to be written to name (a path relative to the output directory)."""
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._write, os.path.join(self.output_dir, name), content, label)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _write(self, path, content, label):
+        start = time.perf_counter()
+        try:
+            for attempt in range(self.retries + 1):
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    with open(temp_path, 'wb') as f:
+                        f.write(content)
+                    os.replace(temp_path, path)
+                    return
+                except OSError as e:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    if attempt == self.retries:
+                        print(f"Error writing {path}: {e}")
+                        self.failed.append((label or path, path, str(e)))
+                    else:
+                        time.sleep(self.retry_delay * 2 ** attempt)
+        finally:
+            self.write_times.append(time.perf_counter() - start)
+            self._slots.release()
+
+    def close(self):
+        """Wait until all queued files are written."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _render_to(render, data):
+    """Render into memory, returning the render result and the PDF bytes."""
+    buffer = io.BytesIO()
+    return render(buffer, data), buffer.getvalue()
+
+
+def _open_writer(archive, output_dir):
+    """Return an ArchiveWriter for archive, or a FileWriter for output_dir."""
+    return ArchiveWriter(archive) if archive is not None else FileWriter(output_dir)
+
+
+def _store_output(writer, output_dir, result):
+    """Hand a rendered PDF to the writer stage."""
+    writer.add(os.path.relpath(result["output"], output_dir), result["pdf_bytes"], result["input"])
+
+
+def _finish_writes(writer, report):
+    """Add the writer's write times to the report and return its failed writes as (label, error) pairs."""
+    if report is not None:
+        for seconds in writer.write_times:
+            report.add_stage("write", seconds)
+    return [(label, error) for label, _, error in writer.failed]
+
+
+def _report_result(result, progress, metrics):
+    """Update progress and metrics with a worker result, printing it if it failed."""
+    failed = result["error"] is not None
+    if failed:
+        print(f"Error processing {result['input']}: {result['error']}")
+    progress.update(failed=failed)
+    if metrics is not None:
+        metrics.add(result.get("timings"), failed=failed)
+
+
+def _is_up_to_date(entry, input_hash, template_version, pdf_filename):
+    """Check whether a manifest entry still describes the current input and output."""
+    return (
+        entry is not None
+        and entry["input_sha256"] == input_hash
+        and entry["template_version"] == template_version
+        and os.path.exists(pdf_filename)
+        and _file_sha256(pdf_filename) == entry["output_sha256"]
+    )
+
+
+# Decoder for payslip records (str or bytes): orjson when installed, else the standard library
+decode_json = orjson.loads if orjson is not None else json.loads
+
+
+class PayslipValidationError(ValueError):
+    """Raised when a payslip record does not match the schema; ``errors`` lists every problem."""
+
+    def __init__(self, errors):
+        super().__init__("Invalid payslip: " + "; ".join(errors))
+        self.errors = errors
+
+
+# Field kinds of the schema: (check, description of the expected value)
+_FIELD_KINDS = {
+    # Rendered as a Paragraph, which needs a string
+    "text": (lambda value: isinstance(value, str), "a string"),
+    # Rendered into a table cell or a template
+    "value": (lambda value: isinstance(value, (str, int, float)) and not isinstance(value, bool), "a string or number"),
+    # Formatted with format_currency, which prints None as an empty cell
+    "amount": (lambda value: value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)), "a number"),
+    # Split into month and year for file names, bundles and the period text
+    "pay_period": (lambda value: isinstance(value, str) and re.fullmatch(r"\d{1,2} / \d{4}", value) is not None, "a 'MM / YYYY' string"),
+}
+
+# Fields of a line item (see the "items" rows of payslip_template.json); any of them may be left out
+LINE_ITEM_SCHEMA = {
+    "lohnart": "value",
+    "kenn": "value",
+    "betrag_e": "amount",
+    "betrag": "amount",
+    "jahreswert": "amount",
+}
+
+
+def _line_item_errors(path, items):
+    """Return the problems of a record's line item list, one per bad item field."""
+    if not isinstance(items, list):
+        return [f"{path} must be a list of line items, got {items!r}"]
+    errors = []
+    for number, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(f"{path}[{number}] must be an object, got {item!r}")
+            continue
+        for key, kind in LINE_ITEM_SCHEMA.items():
+            check, expected = _FIELD_KINDS[kind]
+            if item.get(key) is not None and not check(item[key]):
+                errors.append(f"{path}[{number}].{key} must be {expected}, got {item[key]!r}")
+    return errors
+
+
+def _field_check(kind):
+    """Return (check, describe) for a schema kind; describe(path, value) lists the problems of a failed check."""
+    if kind == "line_items":
+        return (lambda value: not _line_item_errors("", value)), _line_item_errors
+    check, expected = _FIELD_KINDS[kind]
+    return check, lambda path, value: [f"{path} must be {expected}, got {value!r}"]
+
+# Every field the payslip layout reads, by section
+PAYSLIP_SCHEMA = {
+    "arbeitgeber": {
+        "unternehmen": "text",
+        "unternehmen_adresse": "text",
+        "kostenstelle": "value",
+    },
+    "arbeitnehmer": {
+        "gender": "text",
+        "name": "text",
+        "adresse": "text",
+        "personal_nummer": "value",
+        "geburtsdatum": "value",
+        "eintrittsdatum": "value",
+        "steuer_id": "value",
+        "steuerklasse": "value",
+        "kv_prozentsatz": "value",
+        "rv_prozentsatz": "value",
+        "av_prozentsatz": "value",
+        "pv_prozentsatz": "value",
+        "krankenkasse": "value",
+        "beitragsgruppenschluessel": "value",
+        "sv_nummer": "value",
+    },
+    "abrechnungsdetails": {
+        "pay_period": "pay_period",
+        "payroll_date": "value",
+    },
+    "verdienst": {
+        "lohn_bezeichnung": "value",
+        "betrag": "amount",
+        "gesamt_brutto": "amount",
+        # Optional line items replacing the template's default Zusätze
+        "zusaetze": "line_items?",
+    },
+    "steuern_sozialversicherung": {
+        "steuer_brutto": "amount",
+        "kv_brutto": "amount",
+        "rv_brutto": "amount",
+        "av_brutto": "amount",
+        "lohnsteuer": "amount",
+        "kv_beitrag": "amount",
+        "rv_beitrag": "amount",
+        "av_beitrag": "amount",
+        "pv_beitrag": "amount",
+        "netto_verdienst": "amount",
+    },
+    "zahlungsdetails": {
+        "sv_ag_anteil": "amount",
+        "auszahlungsbetrag": "amount",
+        "bank_employee": "value",
+        "bankleitzahl": "value",
+        "Kto": "value",
+        "iban_employee": "value",
+        # Optional line items replacing the template's default Be- und Abzüge
+        "abzuege": "line_items?",
+    },
+    # Year-to-date totals, shown in the Jahreswert column; records written before
+    # the running totals existed lack some or all of them, and the template then
+    # shows the month's figure instead
+    "jahresübersicht": {field: "amount?" for field in YTD_FIELDS},
+}
+
+
+def compile_schema(schema):
+    """Compile a schema ({section: {key: kind}}) into a function returning all errors of a record.
+    
+    A kind ending in "?" marks an optional key, which may also be null; a
+    section holding only optional keys may be left out.
+    """
+    sections = [
+        (section, [(key, kind.endswith("?")) + _field_check(kind.rstrip("?")) for key, kind in fields.items()])
+        for section, fields in schema.items()
+    ]
+
+    def validate(data):
+        if not isinstance(data, dict):
+            return [f"record must be a JSON object, not {type(data).__name__}"]
+        errors = []
+        for section, fields in sections:
+            values = data.get(section)
+            if values is None and all(optional for _, optional, _, _ in fields):
+                continue
+            if not isinstance(values, dict):
+                errors.append(f"{section} is missing" if values is None else f"{section} must be an object")
+                continue
+            for key, optional, check, describe in fields:
+                if key not in values:
+                    if not optional:
+                        errors.append(f"{section}.{key} is missing")
+                elif optional and values[key] is None:
+                    continue
+                elif not check(values[key]):
+                    errors.extend(describe(f"{section}.{key}", values[key]))
+        return errors
+
+    return validate
+
+
+validate_payslip = compile_schema(PAYSLIP_SCHEMA)
+
+
+def check_payslip(data, year_to_date=None):
+    """Validate a parsed payslip record, raising PayslipValidationError with all problems.
+    
+    ``year_to_date`` (totals from YearToDate.add) replaces the record's
+    jahresübersicht figures; the caller's dict is not modified.
+    """
+    if year_to_date is not None and isinstance(data, dict):
+        data = {**data, "jahresübersicht": {**(data.get("jahresübersicht") or {}), **year_to_date}}
+    with timed_stage("validate"):
+        errors = validate_payslip(data)
+    if errors:
+        raise PayslipValidationError(errors)
+    return data
+
+
+def load_payslip(content, year_to_date=None):
+    """Decode and validate one payslip record (JSON str or bytes); see check_payslip."""
+    with timed_stage("json_load"):
+        data = decode_json(content)
+    return check_payslip(data, year_to_date)
+
+
+def _add_year_to_date(accumulator, record):
+    """Add a record (parsed, or JSON str or bytes) to a YearToDate and return its totals.
+    
+    Returns None for records that cannot be read; validation reports those.
+    """
+    try:
+        data = record if isinstance(record, dict) else decode_json(record)
+        return accumulator.add(data)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _file_year_to_date(accumulator, json_file):
+    """Add a JSON file to a YearToDate and return its totals (None if it cannot be read)."""
+    try:
+        with open(json_file, 'rb') as f:
+            return _add_year_to_date(accumulator, f.read())
+    except OSError:
+        return None
+
+
+def _render_json_file(job):
+    """Render a single JSON file to PDF and report the outcome (runs in worker processes).
+    
+    The input is skipped when ``previous`` (its manifest entry) shows it is unchanged
+    and its PDF still exists with the recorded hash. ``year_to_date`` holds the
+    totals to show instead of the file's own, and counts as part of the input.
+    """
+    from payslip_render import RENDER_ENGINES, template_version, use_template_spec
+
+    json_file, pdf_filename, previous, options, year_to_date = job
+    use_template_spec(options["template"])
+    result = {"input": json_file, "output": pdf_filename, "error": None, "skipped": False, "manifest_entry": None, "pdf_bytes": None}
+    with collect_stage_timings(options["instrument"]) as timings:
         try:
             # Load the JSON data
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with timed_stage("json_load"):
+                with open(json_file, 'rb') as f:
+                    content = f.read()
+            data = load_payslip(content, year_to_date)
+            if year_to_date is not None:
+                content += json.dumps(year_to_date, sort_keys=True).encode('utf-8')
+            input_hash = _sha256(content)
+            version = template_version(options['engine'])
             
-            # Create output filename with same structure but .pdf extension
-            pdf_filename = os.path.splitext(json_file)[0] + '.pdf'
-            if output_dir != input_dir:
-                # If different output directory, adjust the path
-                pdf_filename = os.path.join(output_dir, os.path.basename(pdf_filename))
-            
-            # Generate the PDF
-            create_payslip(pdf_filename, data)
-            print(f"Generated PDF: {pdf_filename}")
+            if _is_up_to_date(previous, input_hash, version, pdf_filename):
+                result["skipped"] = True
+                result["manifest_entry"] = previous
+                return result
             
+            # Generate the PDF; the writer stage writes it out
+            _, result["pdf_bytes"] = _render_to(RENDER_ENGINES[options["engine"]], data)
+            result["manifest_entry"] = {
+                "input_sha256": input_hash,
+                "template_version": version,
+                "output": pdf_filename,
+                "output_sha256": _sha256(result["pdf_bytes"]),
+            }
+        
         except Exception as e:
-            print(f"Error processing {json_file}: {str(e)}")
+            result["error"] = str(e)
+        finally:
+            result["timings"] = timings
+    return result
+
+
+def _render_bundle(job):
+    """Render a group of payslips into one PDF and report the outcome (runs in worker processes)."""
+    from payslip_render import BUNDLE_ENGINES, use_template_spec
+
+    pdf_filename, records, options = job
+    use_template_spec(options["template"])
+    result = {"input": pdf_filename, "output": pdf_filename, "error": None, "entries": None, "pdf_bytes": None}
+    with collect_stage_timings(options["instrument"]) as timings:
+        try:
+            pages, result["pdf_bytes"] = _render_to(BUNDLE_ENGINES[options["engine"]], [data for _, data in records])
+            result["entries"] = [
+                {
+                    "source": json_file,
+                    "personal_nummer": data["arbeitnehmer"]["personal_nummer"],
+                    "name": data["arbeitnehmer"]["name"],
+                    "pay_period": data["abrechnungsdetails"]["pay_period"],
+                    "page_offset": page_offset,
+                    "page_count": page_count,
+                }
+                for (json_file, data), (page_offset, page_count) in zip(records, pages)
+            ]
+        
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            result["timings"] = timings
+    return result
+
+
+def _render_annual_summary(job):
+    """Render the annual summary of one employee and report the outcome (runs in worker processes)."""
+    from payslip_render import create_annual_summary, use_template_spec
+
+    pdf_filename, annual, options = job
+    use_template_spec(options["template"])
+    result = {"input": pdf_filename, "output": pdf_filename, "error": None, "pdf_bytes": None}
+    with collect_stage_timings(options["instrument"]) as timings:
+        try:
+            _, result["pdf_bytes"] = _render_to(create_annual_summary, annual)
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            result["timings"] = timings
+    return result
+
+
+def _pay_period_key(data):
+    """Return a (year, month) sort key for a payslip record."""
+    month, year = data["abrechnungsdetails"]["pay_period"].split("/")
+    return int(year), int(month)
+
+
+# Keys that payslips can be bundled by
+BUNDLE_KEYS = {
+    "employee": lambda data: f"{data['arbeitnehmer']['personal_nummer']}_{_pay_period_key(data)[0]}",
+    "kostenstelle": lambda data: data["arbeitgeber"]["kostenstelle"],
+}
+
+
+# Engines of payslip_render.RENDER_ENGINES; listed here so the CLI starts without loading the renderer
+RENDER_ENGINE_NAMES = ["canvas", "platypus"]
+
+
+def _prepare_renderer(template=None):
+    """Load the renderer (and reportlab) and compile the template spec for a render run."""
+    from payslip_render import get_payslip_template, use_template_spec
+
+    use_template_spec(template)
+    get_payslip_template()
+
+
+def _run_chunk(func, chunk):
+    return [func(job) for job in chunk]
+
+
+def _map_jobs(func, jobs, workers):
+    """Run func over jobs and yield the results in order.
     
-    print(f"PDF generation complete. Processed {len(json_files)} files.")
-
-def create_custom_styles():
-    """Create and return custom styles for the payslip document."""
-    styles = getSampleStyleSheet()
-    
-    # Define all custom styles
-    custom_styles = {
-        "title_style": ParagraphStyle(
-            "Title",
-            parent=styles["Heading1"],
-            fontSize=10,
-            alignment=0,
-            spaceAfter=2,
-            leading=10,
-            fontName="Helvetica-Bold",
-        ),
-        "normal_style": ParagraphStyle(
-            "Normal", 
-            parent=styles["Normal"], 
-            fontSize=8, 
-            leading=9
-        ),
-        "bold_style": ParagraphStyle(
-            "Bold", 
-            parent=styles["Normal"], 
-            fontSize=8, 
-            leading=9, 
-            fontName="Helvetica-Bold"
-        ),
-        "header_style": ParagraphStyle(
-            "Header",
-            parent=styles["Heading2"],
-            fontSize=9,
-            textColor=colors.black,
-            spaceAfter=6,
-        ),
-        "small_style": ParagraphStyle(
-            "Small", 
-            parent=styles["Normal"], 
-            fontSize=7, 
-            leading=8
-        ),
-        "micro_style": ParagraphStyle(
-            "Micro",
-            parent=styles["Normal"],
-            fontSize=6,
-            leading=7,
-            spaceBefore=0,
-            spaceAfter=0,
-        ),
-        "notes_style": ParagraphStyle(
-            "Notes",
-            parent=styles["Normal"],
-            fontSize=8,
-            leading=10,
-            alignment="left",
-            textColor=colors.black,
-        ),
-        "centered_style": ParagraphStyle(
-            "Centered",
-            parent=styles["Normal"],
-            fontSize=8,
-            leading=10,
-            alignment=1,  # 1 = center alignment
-            textColor=colors.black,
-        ),
-    }
+    With more than one worker the jobs are sent to a process pool in chunks. Only a
+    few chunks per worker are in flight at a time, so ``jobs`` may be a lazy iterable
+    of any length. The chunks of a lazy iterable start at one job and grow (see
+    _stream_chunk_size), so the first job is sent as soon as it is produced and
+    short runs still use every worker.
+    """
+    if hasattr(jobs, "__len__"):
+        if workers <= 1 or len(jobs) <= 1:
+            yield from map(func, jobs)
+            return
+        chunksize = max(1, min(STREAM_CHUNK_SIZE, len(jobs) // (workers * 4)))
+    elif workers <= 1:
+        yield from map(func, jobs)
+        return
+    else:
+        chunksize = None
     
-    return custom_styles
-
-def create_header_left_table(data, styles):
-    """Create the left part of the header section."""
-    return Table(
-        [
-            [
-                Paragraph(
-                    "ENTGELTABRECHNUNG",
-                    ParagraphStyle(
-                        "Title",
-                        parent=styles["micro_style"],
-                        fontSize=8,
-                        fontName="Helvetica-Bold",
-                    ),
-                )
-            ],
-            [
-                Paragraph(
-                    f"für den Zeitraum vom {data['abrechnungsdetails']['pay_period'].replace(' / ', '.12.2025 bis 31.')}.2025",
-                    styles["micro_style"],
-                )
-            ],
-            [
-                Paragraph(
-                    f"im Monat {data['abrechnungsdetails']['pay_period']} {data['abrechnungsdetails']['payroll_date']} Seite 1/1",
-                    styles["micro_style"],
-                )
-            ],
-            [Spacer(1, 0.1 * cm)],
-            [Paragraph(data["arbeitgeber"]["unternehmen"], styles["bold_style"])],
-            [Paragraph(data["arbeitgeber"]["unternehmen_adresse"], styles["micro_style"])],
-            [Spacer(1, 0.2 * cm)],  # Add a small space between addresses
-            [Paragraph(data["arbeitnehmer"]["gender"], styles["bold_style"])],
-            [Paragraph(data["arbeitnehmer"]["name"], styles["normal_style"])],
-            [Paragraph(data["arbeitnehmer"]["adresse"], styles["micro_style"])],
-        ],
-        colWidths=[10 * cm],
-        style=TableStyle([("BOTTOMPADDING", (0, 0), (-1, -1), 5)]),
-    )
+    # Imported here: loading multiprocessing costs every CLI invocation, even --help
+    from concurrent.futures import ProcessPoolExecutor
 
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        submitted = 0
+        while True:
+            chunk = list(islice(jobs, chunksize or _stream_chunk_size(submitted, workers)))
+            if chunk:
+                pending.append(executor.submit(_run_chunk, func, chunk))
+                submitted += 1
+            if pending and (not chunk or len(pending) >= workers * 4):
+                yield from pending.popleft().result()
+            elif not chunk:
+                break
 
-def create_header_right_table(data):
-    """Create the right part of the header section with personal/organizational data."""
-    return Table(
-        [
-            [Paragraph("<b>Persönliche / Organisatorische Daten</b>", ParagraphStyle("Bold", fontSize=7)), "", "", ""],
-            [
-                "Personalnummer",
-                "Kostenstelle",
-                "Tarifgruppe/-sufe",
-                "Beschäftigungsgrad",
-            ],
-            [data["arbeitnehmer"]["personal_nummer"], data["arbeitgeber"]["kostenstelle"], "OT /", "100,00"],
-            ["Geburtsdatum", "Eintritt", "Austritt", "Steuer-ID"],
-            [
-                data["arbeitnehmer"]["geburtsdatum"],
-                data["arbeitnehmer"]["eintrittsdatum"],
-                "",
-                data["arbeitnehmer"]["steuer_id"],
-            ],
-            ["Steuerklasse", "Faktor", "Kinderfreibeträge", "Konfession AN/EG"],
-            [data["arbeitnehmer"]["steuerklasse"], "0,0", "", "-- /"],
-            ["KV-Prozentsatz", "RV-Prozentsatz", "AV-Prozentsatz", "PV-Prozentsatz"],
-            [
-                data["arbeitnehmer"]["kv_prozentsatz"],
-                data["arbeitnehmer"]["rv_prozentsatz"],
-                data["arbeitnehmer"]["av_prozentsatz"],
-                data["arbeitnehmer"]["pv_prozentsatz"],
-            ],
-            ["Krankenkasse", "Bgrs", "RV-Nummer", ""],
-            [
-                data["arbeitnehmer"]["krankenkasse"],
-                data["arbeitnehmer"]["beitragsgruppenschluessel"],
-                data["arbeitnehmer"]["sv_nummer"],
-                "",
-            ],
-        ],
-        colWidths=[2.0 * cm, 2.0 * cm, 2.0 * cm, 3.0 * cm],
-        style=TableStyle(
-            [
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 6),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("GRID", (0, 0), (-1, -1), 0.3, colors.black),
-                ("SPAN", (0, 0), (3, 0)),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-                ("TOPPADDING", (0, 0), (-1, -1), 2),
-                ("LINEBELOW", (0, 1), (-1, 1), 0.5, colors.black),
-                ("LINEABOVE", (0, 3), (-1, 3), 0.5, colors.black),
-                # Background styles for alternating rows
-                ("BACKGROUND", (0, 0), (3, 0), colors.lightgrey),
-                ("BACKGROUND", (0, 1), (-1, 1), colors.lightgrey),
-                ("BACKGROUND", (0, 3), (-1, 3), colors.lightgrey),
-                ("BACKGROUND", (0, 5), (-1, 5), colors.lightgrey),
-                ("BACKGROUND", (0, 7), (-1, 7), colors.lightgrey),
-                ("BACKGROUND", (0, 9), (-1, 9), colors.lightgrey),
-            ]
-        ),
-    )
 
+# Jobs per chunk sent to a worker process
+STREAM_CHUNK_SIZE = 64
 
-def format_currency(value):
-    """Format currency values according to German standards."""
-    if value is None:
-        return ""
-    return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-
-def create_lohnart_table(data, bold_style, normal_style):
-    """Create the main salary table with all components."""
-    # Entire Lohnart data
-    lohnart_data = [
-        # Header
-        ["Lohnart", "", "", "", "", "Betrag", "Jahreswert"],
-        # Section Headers
-        [
-            Paragraph("<b>Basisbezüge:</b>", bold_style),
-            Paragraph("<b>Kenn.</b>", bold_style),
-            Paragraph("<b>Anzahl</b>", bold_style),
-            Paragraph("<b>Betrag/E</b>", bold_style),
-            Paragraph("<b>Zusatz</b>", bold_style),
-            "",
-            "",
-        ],
-        [
-            f"1005 {data['verdienst']['lohn_bezeichnung']}",
-            "LSG",
-            "1",
-            "",
-            "",
-            format_currency(data["verdienst"]["betrag"]),
-            format_currency(data["verdienst"]["gesamt_brutto"]),
-        ],
-        ["Zusätze:", "", "", "", "", "", ""],
-        ["2301 GWV KV Zusatz MA", "LSG", "", "", "", "3,17", ""],
-        ["2GUV Gruppenunfallversicherung", "", "", "6,57", "", "6,57", "6,57"],
-        ["2072 SB 88 BENEFITS-Pass", "LSG", "", "", "", "40,00", ""],
-        # ===== Bruttoentgelt Section ======
-        [
-            Paragraph("<b>Bruttoentgelt:</b>", bold_style),
-            "",
-            Paragraph("<b>Lfd.Bez:</b>", bold_style),
-            Paragraph("<b>Ein.Bez:</b>", bold_style),
-            Paragraph("<b>Summe:</b>", bold_style),
-            "",
-            "",
-        ],
-        [
-            "Z10E Gesamtbrutto",
-            "",
-            "",
-            "",
-            "",
-            format_currency(data["verdienst"]["gesamt_brutto"]),
-            format_currency(data["verdienst"]["gesamt_brutto"]),
-        ],
-        [
-            "ZSBS Steuerbrutto",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["steuer_brutto"]),
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["steuer_brutto"]),
-            format_currency(data["steuern_sozialversicherung"]["steuer_brutto"]),
-        ],
-        ["ZSTG Pausch ST-Brutto AG", "", "", "", "", "0,00", "0,00"],
-        [
-            "ZKBS SV-Brutto KV/PV",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["kv_brutto"]),
-            "",
-            format_currency(data["steuern_sozialversicherung"]["kv_brutto"]),
-            "",
-            format_currency(data["steuern_sozialversicherung"]["kv_brutto"]),
-        ],
-        [
-            "ZRBS SV-Brutto RV",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["rv_brutto"]),
-            "",
-            format_currency(data["steuern_sozialversicherung"]["rv_brutto"]),
-            "",
-            format_currency(data["steuern_sozialversicherung"]["rv_brutto"]),
-        ],
-        [
-            "ZRBS SV-Brutto AV",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["av_brutto"]),
-            "",
-            format_currency(data["steuern_sozialversicherung"]["av_brutto"]),
-            "",
-            format_currency(data["steuern_sozialversicherung"]["av_brutto"]),
-        ],
-        # Gesetzliche Abzüge Section
-        [Paragraph("<b>Gesetzliche Abzüge:</b>", bold_style), "", "", "", "", "", ""],
-        [
-            "ZLSS Lohnsteuer",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["lohnsteuer"]) + "-",
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["lohnsteuer"]) + "-",
-            "",
-        ],
-        [
-            "ZKVS Krankenversicherung",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["kv_beitrag"]) + "-",
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["kv_beitrag"]) + "-",
-            "",
-        ],
-        [
-            "ZRVS Rentenversicherung",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["rv_beitrag"]) + "-",
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["rv_beitrag"]) + "-",
-            "",
-        ],
-        [
-            "ZAVS Arbeitslosenversicherung",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["av_beitrag"]) + "-",
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["av_beitrag"]) + "-",
-            "",
-        ],
-        [
-            "ZPVS Pflegeversicherung",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["pv_beitrag"]) + "-",
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["pv_beitrag"]) + "-",
-            "",
-        ],
-        # Netto Section
-        [
-            Paragraph("<b>Netto:</b>", bold_style),
-            "",
-            "",
-            "",
-            "",
-            format_currency(data["steuern_sozialversicherung"]["netto_verdienst"]),
-            "",
-        ],
-        ["Gesetzliches Netto", "", "", "", "", "", ""],
-        # Be- und Abzüge Section
-        [Paragraph("<b>Be- und Abzüge:</b>", bold_style), "", "", "", "", "", ""],
-        ["2301 GWV KV Zusatz MA", "", "", "", "", "3,17-", ""],
-        ["ZGUV Gruppenunfallversicherung", "", "", "", "", "6,57-", ""],
-        ["2072 SB 88 BENEFITS-Pass", "", "", "", "", "40,00-", ""],
-        [
-            "/408 LSt pausch AG",
-            "",
-            "",
-            "",
-            "",
-            format_currency(data["zahlungsdetails"]["sv_ag_anteil"]),
-            format_currency(data["zahlungsdetails"]["sv_ag_anteil"]),
-        ],
-        # Zahlungen Section
-        [Paragraph("<b>Zahlungen:</b>", bold_style), "", "", "", "", "", ""],
-        [
-            "/559 Überweisung",
-            "",
-            "",
-            "",
-            "",
-            format_currency(data["zahlungsdetails"]["auszahlungsbetrag"]) + " EUR",
-            "",
-        ],
-        [
-            data["zahlungsdetails"]["bank_employee"],
-            f"BLZ: {data['zahlungsdetails']['bankleitzahl']}",
-            "",
-            f"Kto: {data['zahlungsdetails']['Kto']}",
-            "",
-            "",
-        ],
-        ["", data["zahlungsdetails"]["iban_employee"], "", "", "", "", ""],
-    ]
 
-    # Create the table with adjusted column widths
-    lohnart_table = Table(
-        lohnart_data,
-        colWidths=[5 * cm, 1.5 * cm, 1.5 * cm, 2 * cm, 1.5 * cm, 2.5 * cm, 2.5 * cm],
-    )
+def _stream_chunk_size(submitted, workers):
+    """Size of the next chunk of a lazy job iterable after ``submitted`` chunks.
+    
+    Every worker first gets single jobs, then chunks of 2, 4, ... up to
+    STREAM_CHUNK_SIZE, one round of ``workers`` chunks per size.
+    """
+    return min(STREAM_CHUNK_SIZE, 2 ** min(submitted // workers, STREAM_CHUNK_SIZE.bit_length()))
 
-    # Custom style to match the borderless look
-    lohnart_table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 1, colors.black),
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),
-                ("TOPPADDING", (0, 0), (-1, -1), 2),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-                ("LEFTPADDING", (0, 0), (-1, -1), 5),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 5),
-                ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                ("BACKGROUND", (0, 0), (6, 0), colors.lightgrey),
-                ("TEXTCOLOR", (0, 1), (0, -1), colors.black),
-                ("FONTNAME", (0, 1), (0, -1), "Helvetica"),
-                ("FONTSIZE", (0, 1), (0, -1), 9),
-                ("LINEAFTER", (4, 0), (5, -1), 0.5, colors.black),
-            ]
-        )
-    )
+# Output file names for streamed records; fields come from _filename_fields. Names
+# are not unique, so the personal number keeps namesakes apart
+DEFAULT_NAME_TEMPLATE = "payslip_{name}_{personal_nummer}_{pay_period}.pdf"
 
-    return lohnart_table
+
+def _filename_fields(data):
+    """Return the record fields available to output file name templates."""
+    month, year = (part.strip() for part in data["abrechnungsdetails"]["pay_period"].split("/"))
+    fields = {
+        "name": data["arbeitnehmer"]["name"],
+        "personal_nummer": data["arbeitnehmer"]["personal_nummer"],
+        "kostenstelle": data["arbeitgeber"]["kostenstelle"],
+        "pay_period": f"{month}_{year}",
+        "month": month,
+        "year": year,
+    }
+    # Keep every field a single path component
+    return {key: str(value).replace(os.sep, "_").replace(" ", "_") for key, value in fields.items()}
 
 
-def create_payslip(filename, data):
-    """Create a PDF payslip with the given data."""
-    # Set up the document
-    doc = SimpleDocTemplate(
-        filename,
-        pagesize=A4,
-        leftMargin=1.5 * cm,
-        rightMargin=1.5 * cm,
-        topMargin=1.0 * cm,
-        bottomMargin=1.0 * cm,
+# JSON Lines files read by iter_jsonl, plain or compressed
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def jsonl_files(directory):
+    """Return the JSON Lines (shard) files in a directory, in name order; run journals are not inputs."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(JSONL_SUFFIXES) and not _is_bookkeeping_file(name)
     )
 
-    # Get common styles
-    styles = create_custom_styles()
-    elements = []
-
-    # Add vertical Space at the top
-    elements.append(Spacer(1, 0.5 * cm))
-
-    # Create header tables
-    header_left_table = create_header_left_table(data, styles)
-    header_right_table = create_header_right_table(data)
-    
-    # Combine header tables
-    header_personal_table = Table(
-        [[header_left_table, header_right_table]],
-        colWidths=[10 * cm, 10 * cm],
-        rowHeights=[5.5 * cm],
-        style=TableStyle(
-            [
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("TOPPADDING", (0, 0), (-1, -1), 5),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
-            ]
-        ),
+
+def _open_jsonl(path):
+    """Open a JSON Lines file for reading text, decompressing .gz and .zst files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the zstandard package")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_jsonl(source):
+    """Yield (label, line) for every non-empty line of a JSON Lines source.
+    
+    The source is a .jsonl file (optionally .gz or .zst compressed), a directory
+    of such files (read in name order), or '-' for stdin.
+    """
+    if source != "-" and os.path.isdir(source):
+        for path in jsonl_files(source):
+            yield from iter_jsonl(path)
+        return
+    
+    f = sys.stdin if source == "-" else _open_jsonl(source)
+    try:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield f"{source}:{line_number}", line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _render_record(job):
+    """Render one record (a JSON line or an already parsed dict) to PDF and report the outcome (runs in worker processes)."""
+    from payslip_render import RENDER_ENGINES, use_template_spec
+
+    label, record, output_dir, name_template, options, year_to_date = job
+    use_template_spec(options["template"])
+    result = {"input": label, "output": None, "error": None, "pdf_bytes": None}
+    with collect_stage_timings(options["instrument"]) as timings:
+        try:
+            if isinstance(record, (str, bytes)):
+                data = load_payslip(record, year_to_date)
+            else:
+                data = check_payslip(record, year_to_date)
+            result["output"] = os.path.join(output_dir, name_template.format(**_filename_fields(data)))
+            _, result["pdf_bytes"] = _render_to(RENDER_ENGINES[options["engine"]], data)
+        
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            result["timings"] = timings
+    return result
+
+
+def generate_pdfs_from_records(records, output_dir=".", workers=None, engine="platypus", name_template=DEFAULT_NAME_TEMPLATE, archive=None, metrics=None,
+                               template=None, ytd_state=None):
+    """Generate PDF payslips from an iterable of (label, record) pairs.
+    
+    A record is a JSON string or an already parsed payslip dict; the label
+    identifies it in error messages. Records are streamed, so memory use does
+    not grow with the input. Output file names come from ``name_template``,
+    formatted with the fields of ``_filename_fields``; a record whose file name
+    an earlier record already took fails instead of replacing that PDF (only
+    the names are remembered).
+    With ``archive`` set to a .zip/.tar path, PDFs are rendered in memory and written
+    into that archive under their path relative to ``output_dir``.
+    With ``metrics`` set to a .json/.csv path, per-stage timings are collected and
+    written there as a report. ``template`` is the template spec to render with
+    (default: DEFAULT_TEMPLATE_SPEC).
+    With ``ytd_state`` set to a path, the year-to-date totals shown are taken
+    from the running totals persisted there (see YearToDate), updated with
+    every record, instead of from the records themselves.
+    Returns a summary with the number of processed and generated records and the
+    failed inputs.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if archive is None:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    # Compile the template up front, so an invalid spec fails before any rendering
+    _prepare_renderer(template)
+    options = {"engine": engine, "instrument": metrics is not None, "template": template}
+    year_to_date = YearToDate(ytd_state) if ytd_state is not None else None
+    jobs = (
+        (label, record, output_dir, name_template, options,
+         _add_year_to_date(year_to_date, record) if year_to_date is not None else None)
+        for label, record in records
     )
-    elements.append(header_personal_table)
+    
+    summary = {"processed": 0, "succeeded": 0, "failed": []}
+    report = MetricsReport() if metrics is not None else None
+    progress = ProgressReporter(unit="records")
+    outputs = set()
+    with _open_writer(archive, output_dir) as writer:
+        for result in _map_jobs(_render_record, jobs, workers):
+            summary["processed"] += 1
+            if result["output"] in outputs and result["error"] is None:
+                result["error"] = f"{result['output']} was already written for an earlier record"
+            outputs.add(result["output"])
+            _report_result(result, progress, report)
+            if result["error"] is None:
+                summary["succeeded"] += 1
+                _store_output(writer, output_dir, result)
+            else:
+                summary["failed"].append((result["input"], result["error"]))
+    for label, error in _finish_writes(writer, report):
+        summary["succeeded"] -= 1
+        summary["failed"].append((label, error))
+    progress.finish()
+    if year_to_date is not None:
+        year_to_date.save()
+    if report is not None:
+        report.write(metrics)
+    
+    print(
+        f"PDF generation complete. Processed {summary['processed']} records "
+        f"({summary['succeeded']} succeeded, {len(summary['failed'])} failed)."
+    )
+    return summary
+
+
+def generate_pdfs_from_jsonl(source, output_dir=".", workers=None, engine="platypus", name_template=DEFAULT_NAME_TEMPLATE, archive=None, metrics=None,
+                             template=None, ytd_state=None):
+    """Generate PDF payslips from JSON Lines (see iter_jsonl), one record per line.
+    
+    See generate_pdfs_from_records for the options and the returned summary.
+    """
+    return generate_pdfs_from_records(iter_jsonl(source), output_dir, workers, engine, name_template, archive, metrics, template, ytd_state)
+
 
-    # Add space after the header
-    elements.append(Spacer(1, 1.1 * cm))
+def _pdf_filename(json_file, input_dir, output_dir):
+    """Return the PDF path for a JSON file: next to it, or flat in a different output directory."""
+    # Create output filename with same structure but .pdf extension
+    pdf_filename = os.path.splitext(json_file)[0] + '.pdf'
+    if output_dir != input_dir:
+        # If different output directory, adjust the path
+        pdf_filename = os.path.join(output_dir, os.path.basename(pdf_filename))
+    return pdf_filename
 
-    # Add main salary table
-    lohnart_table = create_lohnart_table(data, styles["bold_style"], styles["normal_style"])
-    elements.append(lohnart_table)
 
-    # Add footer section
-    elements.append(Spacer(1, 1 * cm))
+def parse_shard(value):
+    """Parse an 'i/N' shard specification (0 <= i < N) into (i, N)."""
+    index, _, count = value.partition("/")
+    index, count = int(index), int(count)
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be between 0 and {count - 1}: {value}")
+    return index, count
+
+
+def _in_shard(relative_path, shard):
+    """Assign a file to a shard by a stable hash of its path relative to the input directory."""
+    index, count = shard
+    return zlib.crc32(relative_path.replace(os.sep, "/").encode("utf-8")) % count == index
+
+
+def iter_json_files(input_dir, shard=None, report=None):
+    """Yield the payslip JSON files below input_dir lazily, in a deterministic order.
     
-    # Footer text paragraphs
-    elements.append(
-        Paragraph(
-            "Wenn du Fragen zu deiner Verdienstabrechnung hast, dann nutze bitte das HR Serviceportal. Dies findest du im Self-Service-Portal in<br/>"
-            "Confluence unter 'Viel genutzt'- Human Resources.",
-            styles["centered_style"],
+    Directories are scanned one at a time with os.scandir and their entries
+    visited in name order, so memory use depends on the largest directory
+    rather than the whole tree. With ``shard`` set to (i, N), only files whose
+    relative path hashes to shard i are yielded, so N machines can split a tree
+    without coordinating. Directory scan times are added to ``report`` as the
+    'discovery' stage. Manifests and journals written into the tree by earlier
+    runs are not inputs and are left out.
+    """
+    pending = [input_dir]
+    while pending:
+        directory = pending.pop()
+        start = time.perf_counter()
+        try:
+            with os.scandir(directory) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Error reading directory {directory}: {e}")
+            continue
+        if report is not None:
+            report.add_stage("discovery", time.perf_counter() - start)
+        
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif entry.name.endswith('.json') and 'payslip_' in entry.name and not _is_bookkeeping_file(entry.name):
+                if shard is None or _in_shard(os.path.relpath(entry.path, input_dir), shard):
+                    yield entry.path
+        # Visit subdirectories depth first, in name order
+        pending.extend(reversed(subdirectories))
+
+
+def _validate_input(job):
+    """Check one input against the payslip schema and return (label, errors) (runs in worker processes).
+    
+    The input is a JSON file path, or a JSON line when ``label`` differs from it.
+    """
+    label, source = job
+    try:
+        if label == source:
+            with open(source, 'rb') as f:
+                source = f.read()
+        load_payslip(source)
+    except PayslipValidationError as e:
+        return label, e.errors
+    except (OSError, ValueError) as e:
+        return label, [str(e)]
+    return label, []
+
+
+def validate_inputs(source, workers=None, shard=None):
+    """Check every payslip input against the schema without rendering.
+    
+    The source is a directory of JSON files (optionally restricted to ``shard``)
+    or a JSON Lines source (see iter_jsonl). Every invalid input is printed with
+    all of its problems. Returns a summary with the number of checked inputs and
+    the invalid ones as (label, errors) pairs.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if source == "-" or os.path.isfile(source) or (os.path.isdir(source) and jsonl_files(source)):
+        jobs = iter_jsonl(source)
+    else:
+        jobs = ((json_file, json_file) for json_file in iter_json_files(source, shard))
+    
+    summary = {"checked": 0, "invalid": []}
+    progress = ProgressReporter(unit="records")
+    for label, errors in _map_jobs(_validate_input, jobs, workers):
+        summary["checked"] += 1
+        progress.update(failed=bool(errors))
+        if errors:
+            summary["invalid"].append((label, errors))
+            print(f"Invalid {label}:")
+            for error in errors:
+                print(f"  {error}")
+    progress.finish()
+    
+    print(f"Validation complete. Checked {summary['checked']} records ({len(summary['invalid'])} invalid).")
+    return summary
+
+
+def generate_pdfs_from_json(input_dir, output_dir=None, workers=None, engine="platypus", bundle=None, force=False, archive=None, metrics=None, shard=None,
+                            resume=False, retry_failed=False, template=None, ytd_state=None, annual_summary=False):
+    """Generate PDF payslips from JSON data files.
+    
+    Files are rendered in a process pool of ``workers`` processes (default: CPU count)
+    with the given render engine (see ``RENDER_ENGINE_NAMES``). With ``bundle`` set to one
+    of ``BUNDLE_KEYS``, payslips sharing that key are written to a single PDF and a
+    page-offset index is written to ``bundle_index.json``. With ``annual_summary``
+    set, one annual summary per employee and year is written instead (see
+    ``iter_annual_summaries``); the monthly files are folded in a single
+    streaming pass, so memory use is bounded by one employee's figures.
+    
+    Input files are discovered lazily (see ``iter_json_files``), so rendering
+    starts as soon as the first file is found; ``shard`` (i, N) restricts the run
+    to one of N stable partitions of the input tree.
+    
+    Single-file runs are incremental: a manifest in the output directory maps each
+    input to the hash of its content, the template version and its PDF, and inputs
+    that are unchanged since the last run are skipped unless ``force`` is set.
+    Every outcome is also checkpointed to a journal (see ``RunJournal``): with
+    ``resume`` an interrupted run continues where it stopped, skipping inputs the
+    journal records as done (if their PDF is intact), and with ``retry_failed``
+    only the inputs the journal records as failed are rendered again.
+    
+    PDFs are rendered in memory by the workers and written out by a separate writer
+    stage (see ``FileWriter``), so rendering never waits on storage; writes that
+    still fail after retrying are reported as failed. With ``archive`` set to a
+    .zip/.tar path, PDFs are written into that archive under their path relative
+    to the output directory instead.
+    
+    With ``metrics`` set to a .json/.csv path, per-stage timings (discovery, JSON
+    load, flowable construction, build and write) are collected and written there
+    as a report with histograms and files/second.
+    
+    ``template`` is the template spec to render with (default:
+    DEFAULT_TEMPLATE_SPEC); PDFs rendered with a different spec are not
+    considered up to date.
+    
+    With ``ytd_state`` set to a path, the year-to-date totals shown are taken
+    from the running totals persisted there (see YearToDate), updated with
+    every input, instead of from the inputs themselves; each month then costs
+    one update, without reading the employee's earlier months. The totals are
+    part of the manifest's input hash, so when an earlier month is corrected,
+    later months rendered before the correction are re-rendered next run.
+    Returns a summary dict with the generated, skipped and failed inputs.
+    """
+    # If no output directory specified, use the input directory
+    if output_dir is None:
+        output_dir = input_dir
+    
+    # Default to one worker per CPU core
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    # Make sure output directory exists
+    if archive is None and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    report = MetricsReport() if metrics is not None else None
+    # Compile the template up front, so an invalid spec fails before any rendering
+    _prepare_renderer(template)
+    options = {"engine": engine, "instrument": report is not None, "template": template}
+    year_to_date = YearToDate(ytd_state) if ytd_state is not None else None
+    
+    if (resume or retry_failed) and (bundle is not None or annual_summary or archive is not None):
+        raise ValueError("Resuming is only supported for single-file runs written to a directory")
+    if bundle is not None and annual_summary:
+        raise ValueError("Bundles and annual summaries cannot be combined")
+    if ytd_state is not None and shard is not None:
+        # Shards split the inputs by path, so each one would see only some of an employee's months
+        raise ValueError("Year-to-date state cannot be combined with sharding")
+    journal_entries = load_journal(output_dir, shard) if resume or retry_failed else {}
+    
+    if retry_failed:
+        json_files = sorted(
+            json_file for json_file, entry in journal_entries.items()
+            if entry["status"] == "failed"
         )
-    )
-    elements.append(Spacer(1, 0.5 * cm))
-    elements.append(
-        Paragraph(
-            "Bescheinigung gemäß § 108 Absatz 3 Satz 1 Gewerbeordnung. Bitte sorgfältig aufbewahren.<br/>"
-            "Kennzeichen: (E)inmalzahlung, (L)ohnsteuer-, (S)V-pflichtig, (G)esamtbrutto",
-            styles["centered_style"],
+    else:
+        # Find all JSON files in the input directory (including subdirectories)
+        # Files are found lazily, so rendering starts with the first one. Bundles
+        # (and annual summaries) are sharded by bundle key instead, so each
+        # bundle stays on one machine.
+        json_files = iter_json_files(input_dir, shard if bundle is None and not annual_summary else None, report)
+    
+    summary = {"processed": 0, "succeeded": [], "skipped": [], "failed": []}
+    
+    if bundle is not None or annual_summary:
+        with _open_writer(archive, output_dir) as writer:
+            if annual_summary:
+                _generate_annual_summaries(json_files, input_dir, output_dir, workers, options, summary, writer, report, shard)
+            else:
+                _generate_bundles(json_files, output_dir, bundle, workers, options, summary, writer, report, shard, year_to_date)
+        for label, error in _finish_writes(writer, report):
+            # Bundles and summaries are labelled with their output path
+            if label in summary["succeeded"]:
+                summary["succeeded"].remove(label)
+            summary["failed"].append((label, error))
+    else:
+        # Archives are always written in full
+        manifest = {} if force or archive is not None else load_manifest(output_dir, shard)
+        # Work checkpointed by an interrupted run; its manifest was never saved
+        for json_file, entry in journal_entries.items():
+            if entry["status"] == "done":
+                manifest[json_file] = entry["manifest_entry"]
+        
+        # Pair each JSON file with its output filename and previous manifest entry
+        jobs = (
+            (json_file, _pdf_filename(json_file, input_dir, output_dir), manifest.get(json_file), options,
+             _file_year_to_date(year_to_date, json_file) if year_to_date is not None else None)
+            for json_file in json_files
         )
+        
+        # Process each JSON file
+        progress = ProgressReporter()
+        journal_filename = _manifest_filename(output_dir, shard, JOURNAL_FILENAME)
+        with RunJournal(journal_filename, append=resume or retry_failed) if archive is None else nullcontext() as journal:
+            with _open_writer(archive, output_dir) as writer:
+                for result in _map_jobs(_render_json_file, jobs, workers):
+                    summary["processed"] += 1
+                    _report_result(result, progress, report)
+                    _collect_result(result, summary, manifest, writer, output_dir, journal)
+            # Files the writer stage could not write are failures, and must be rendered again next run
+            for label, error in _finish_writes(writer, report):
+                summary["succeeded"].remove(manifest.pop(label)["output"])
+                summary["failed"].append((label, error))
+                if journal is not None:
+                    journal.record(label, "failed", error=error)
+        progress.finish()
+        if archive is None:
+            save_manifest(output_dir, manifest, shard)
+    if year_to_date is not None:
+        year_to_date.save()
+    
+    if report is not None:
+        report.write(metrics)
+    
+    print(
+        f"PDF generation complete. Processed {summary['processed']} files "
+        f"({len(summary['succeeded'])} succeeded, {len(summary['skipped'])} unchanged, "
+        f"{len(summary['failed'])} failed)."
     )
+    return summary
+
+
+def _collect_result(result, summary, manifest, writer, output_dir, journal=None):
+    """Record a per-file result in the summary, the manifest and the journal, and hand its PDF to the writer."""
+    if result["error"] is not None:
+        manifest.pop(result["input"], None)
+        summary["failed"].append((result["input"], result["error"]))
+        if journal is not None:
+            journal.record(result["input"], "failed", error=result["error"])
+        return
+    
+    if result["manifest_entry"] is not None:
+        manifest[result["input"]] = result["manifest_entry"]
+    if journal is not None:
+        journal.record(result["input"], "done", manifest_entry=result["manifest_entry"])
+    if result["skipped"]:
+        summary["skipped"].append(result["output"])
+    else:
+        summary["succeeded"].append(result["output"])
+        _store_output(writer, output_dir, result)
+
+
+def _generate_bundles(json_files, output_dir, bundle, workers, options, summary, writer, report=None, shard=None, year_to_date=None):
+    """Group JSON files by bundle key, render one PDF per group and write the page index."""
+    bundle_key = BUNDLE_KEYS[bundle]
+    
+    # Load and group the records
+    groups = {}
+    for json_file in json_files:
+        try:
+            with open(json_file, 'rb') as f:
+                content = f.read()
+            totals = _add_year_to_date(year_to_date, content) if year_to_date is not None else None
+            data = load_payslip(content, totals)
+            groups.setdefault(bundle_key(data), []).append((json_file, data))
+        except Exception as e:
+            summary["processed"] += 1
+            summary["failed"].append((json_file, str(e)))
+            print(f"Error processing {json_file}: {str(e)}")
+    
+    jobs = []
+    for key, records in sorted(groups.items()):
+        if shard is not None and not _in_shard(str(key), shard):
+            continue
+        summary["processed"] += len(records)
+        records.sort(key=lambda record: (record[1]["arbeitnehmer"]["personal_nummer"], _pay_period_key(record[1])))
+        safe_key = str(key).replace(os.sep, "_").replace(" ", "_")
+        jobs.append((os.path.join(output_dir, f"payslips_{safe_key}.pdf"), records, options))
+    
+    index = {}
+    progress = ProgressReporter(total=len(jobs), unit="bundles")
+    for result in _map_jobs(_render_bundle, jobs, workers):
+        _report_result(result, progress, report)
+        if result["error"] is None:
+            summary["succeeded"].append(result["output"])
+            index[os.path.basename(result["output"])] = result["entries"]
+            _store_output(writer, output_dir, result)
+        else:
+            summary["failed"].append((result["output"], result["error"]))
+    progress.finish()
+    
+    index_filename = os.path.join(output_dir, "bundle_index.json" if shard is None else f"bundle_index.shard-{shard[0]}-of-{shard[1]}.json")
+    writer.add(os.path.basename(index_filename), json.dumps(index, ensure_ascii=False, indent=2).encode('utf-8'))
+    print(f"Wrote page index: {index_filename}")
+
+
+# Columns of the annual summary: heading and the monthly figure that is summed
+ANNUAL_SUMMARY_COLUMNS = [
+    ("Gesamtbrutto", lambda data: data["verdienst"]["gesamt_brutto"]),
+    ("Steuerbrutto", lambda data: data["steuern_sozialversicherung"]["steuer_brutto"]),
+    ("Lohnsteuer", lambda data: data["steuern_sozialversicherung"]["lohnsteuer"]),
+    ("SV-Beiträge", lambda data: sum(
+        data["steuern_sozialversicherung"][key] or 0 for key in ("kv_beitrag", "rv_beitrag", "av_beitrag", "pv_beitrag")
+    )),
+    ("Netto", lambda data: data["steuern_sozialversicherung"]["netto_verdienst"]),
+    ("Auszahlung", lambda data: data["zahlungsdetails"]["auszahlungsbetrag"]),
+]
+
 
-    elements.append(PageBreak())
+def iter_annual_summaries(json_files, summary, shard=None):
+    """Fold the monthly payslips of each employee into annual totals in one streaming pass.
     
-    # Adjust bottom margin to ensure content fits
-    doc.bottomMargin = 0.5 * cm
+    The input must hold one directory per employee (as written by the data
+    generator). Consecutive files of a directory are folded per year as they
+    are read, and the directory's annual summaries are yielded as soon as the
+    next directory starts, so only one employee's figures are held at a time.
+    A summary is a dict with the ``directory`` its files came from, the
+    employee's ``arbeitgeber`` and ``arbeitnehmer`` data (from the latest
+    month), the ``year``, the figures per ``months`` (in cents, see
+    ANNUAL_SUMMARY_COLUMNS) and their ``totals``; a month that occurs twice
+    counts with its last figures. Employees in different directories are never
+    mixed, even when they share a personal number; a directory holding several
+    employees (e.g. one directory per month) raises ValueError. With ``shard``
+    (i, N) only employees whose key hashes to shard i are summarised, like
+    employee bundles. Files that cannot be read are added to the summary's
+    failures.
+    """
+    directory = None
+    employee = None
+    annuals = {}
+    for json_file in json_files:
+        try:
+            with open(json_file, 'rb') as f:
+                data = load_payslip(f.read())
+            key = BUNDLE_KEYS["employee"](data)
+            if shard is not None and not _in_shard(key, shard):
+                continue
+            summary["processed"] += 1
+            year, month = _pay_period_key(data)
+            values = [round((getter(data) or 0) * 100) for _, getter in ANNUAL_SUMMARY_COLUMNS]
+        except Exception as e:
+            summary["processed"] += 1
+            summary["failed"].append((json_file, str(e)))
+            print(f"Error processing {json_file}: {str(e)}")
+            continue
+        
+        if os.path.dirname(json_file) != directory:
+            yield from annuals.values()
+            directory = os.path.dirname(json_file)
+            employee = data["arbeitnehmer"]["personal_nummer"]
+            annuals = {}
+        elif data["arbeitnehmer"]["personal_nummer"] != employee:
+            raise ValueError(
+                f"{json_file}: {directory} holds the payslips of more than one employee "
+                f"({employee} and {data['arbeitnehmer']['personal_nummer']}); annual summaries "
+                "need one directory per employee (e.g. employee_1/)"
+            )
+        annual = annuals.get(key)
+        if annual is None:
+            annual = annuals[key] = {
+                "key": key,
+                "directory": directory,
+                "year": year,
+                "columns": [label for label, _ in ANNUAL_SUMMARY_COLUMNS],
+                "months": {},
+                "totals": [0] * len(values),
+            }
+        previous = annual["months"].get(month, [0] * len(values))
+        annual["months"][month] = values
+        annual["totals"] = [total + value - old for total, value, old in zip(annual["totals"], values, previous)]
+        annual["arbeitgeber"] = data["arbeitgeber"]
+        annual["arbeitnehmer"] = data["arbeitnehmer"]
+    yield from annuals.values()
+
 
-    # Build PDF
-    doc.build(elements)
+def _annual_summary_filename(annual, input_dir, output_dir):
+    """Return the PDF path of an annual summary, in the output directory mirroring its employee's directory."""
+    name = f"jahresuebersicht_{str(annual['key']).replace(os.sep, '_').replace(' ', '_')}.pdf"
+    return os.path.normpath(os.path.join(output_dir, os.path.relpath(annual["directory"], input_dir), name))
+
+
+def _generate_annual_summaries(json_files, input_dir, output_dir, workers, options, summary, writer, report=None, shard=None):
+    """Render one annual summary PDF per employee and year from the monthly JSON files."""
+    jobs = (
+        (_annual_summary_filename(annual, input_dir, output_dir), annual, options)
+        for annual in iter_annual_summaries(json_files, summary, shard)
+    )
+    progress = ProgressReporter(unit="summaries")
+    for result in _map_jobs(_render_annual_summary, jobs, workers):
+        _report_result(result, progress, report)
+        if result["error"] is None:
+            summary["succeeded"].append(result["output"])
+            _store_output(writer, output_dir, result)
+        else:
+            summary["failed"].append((result["output"], result["error"]))
+    progress.finish()
 
 
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate PDF payslips from JSON data')
-    parser.add_argument('--input', type=str, default='test_data', help='Input directory with JSON files')
+    parser.add_argument('--input', type=str, default='test_data', help="Input directory with JSON files or JSON Lines shards, a .jsonl(.gz/.zst) file, or '-' for JSON Lines on stdin")
     parser.add_argument('--output', type=str, default=None, help='Output directory for PDFs (default: same as input)')
+    parser.add_argument('--name-template', type=str, default=DEFAULT_NAME_TEMPLATE, help='Output file name template for JSON Lines input (fields: name, personal_nummer, kostenstelle, pay_period, month, year)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--engine', choices=RENDER_ENGINE_NAMES, default='platypus', help='Render engine (default: platypus)')
+    parser.add_argument('--archive', type=str, default=None, help='Write PDFs into this .zip/.tar/.tar.gz archive instead of separate files')
+    parser.add_argument('--metrics', type=str, default=None, help='Collect per-stage timings and write a report to this .json or .csv file')
+    parser.add_argument('--force', action='store_true', help='Re-render all inputs, ignoring the manifest')
+    parser.add_argument('--bundle', choices=sorted(BUNDLE_KEYS), default=None, help='Write one PDF per employee and year or per cost centre, with a page index')
+    parser.add_argument('--annual-summary', action='store_true', help='Write one annual summary PDF per employee and year from the monthly JSON files (input: one directory per employee)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run, skipping inputs its journal records as done')
+    parser.add_argument('--retry-failed', action='store_true', help='Only re-render the inputs the journal records as failed')
+    parser.add_argument('--shard', type=str, default=None, help='Only render shard i/N (0 <= i < N) of a JSON input directory, split by a stable hash of the file paths')
+    parser.add_argument('--template', type=str, default=None, help='Template spec (.json, or .yaml with PyYAML) describing the payslip tables (default: payslip_template.json)')
+    parser.add_argument('--ytd-state', type=str, default=None, help='Take the year-to-date totals from running totals kept in this file (.json or .json.gz) and update them with every input')
+    parser.add_argument('--validate-only', action='store_true', help='Only check the inputs against the payslip schema, without rendering; exits with status 1 if any is invalid')
     
     args = parser.parse_args()
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(f"--shard: {e}")
+    
+    if args.validate_only:
+        print(f"Validating payslip inputs in {'stdin' if args.input == '-' else args.input}...")
+        summary = validate_inputs(args.input, workers=args.workers, shard=shard)
+        sys.exit(1 if summary["invalid"] else 0)
     
-    print(f"Generating PDFs from JSON files in {args.input}...")
-    generate_pdfs_from_json(args.input, args.output)
+    if args.input == '-' or os.path.isfile(args.input) or (os.path.isdir(args.input) and jsonl_files(args.input)):
+        if shard is not None or args.resume or args.retry_failed or args.annual_summary:
+            parser.error("--shard, --resume, --retry-failed and --annual-summary only apply to directories of JSON files")
+        print(f"Generating PDFs from JSON Lines in {'stdin' if args.input == '-' else args.input}...")
+        if args.input == '-':
+            output_dir = args.output or '.'
+        elif os.path.isdir(args.input):
+            output_dir = args.output or args.input
+        else:
+            output_dir = args.output or os.path.dirname(args.input) or '.'
+        generate_pdfs_from_jsonl(args.input, output_dir, workers=args.workers, engine=args.engine, name_template=args.name_template, archive=args.archive, metrics=args.metrics,
+                                 template=args.template, ytd_state=args.ytd_state)
+    else:
+        if (args.resume or args.retry_failed) and (args.bundle or args.annual_summary or args.archive):
+            parser.error("--resume and --retry-failed cannot be combined with --bundle, --annual-summary or --archive")
+        if args.bundle and args.annual_summary:
+            parser.error("--bundle and --annual-summary cannot be combined")
+        if args.ytd_state and shard is not None:
+            parser.error("--ytd-state cannot be combined with --shard")
+        print(f"Generating PDFs from JSON files in {args.input}...")
+        try:
+            generate_pdfs_from_json(args.input, args.output, workers=args.workers, engine=args.engine, bundle=args.bundle, force=args.force, archive=args.archive, metrics=args.metrics, shard=shard,
+                                    resume=args.resume, retry_failed=args.retry_failed, template=args.template,
+                                    ytd_state=args.ytd_state, annual_summary=args.annual_summary)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
     print("Done!")
\ No newline at end of file
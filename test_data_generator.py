@@ -1,29 +1,46 @@
+import gzip
+import hashlib
 import json
 import os
 import random
-import copy
-from datetime import datetime, timedelta
-from faker import Faker
+from collections import deque
+from datetime import date, timedelta
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from payslip_ytd import YearToDate
+
+class _LazyFaker:
+    """The shared Faker instance, created on first use.
+
+    Importing faker and setting up a locale takes longer than the rest of the
+    start-up together, and --help or a run from an identity pool never needs it.
+    """
+
+    def __init__(self, locale):
+        self._locale = locale
+        self._faker = None
+
+    def __getattr__(self, name):
+        if self._faker is None:
+            from faker import Faker
+            self._faker = Faker(self._locale)
+        return getattr(self._faker, name)
 
 # Initialize Faker with German locale
-fake = Faker('de_DE')
+fake = _LazyFaker('de_DE')
 
-def generate_employee_data():
-    """Generate random employee data using Faker."""
-    gender = "Herr" if fake.boolean(chance_of_getting_true=60) else "Frau"
-    first_name = fake.first_name_male() if gender == "Herr" else fake.first_name_female()
-    last_name = fake.last_name()
-    
-    # Generate birth date (between 20-65 years old)
-    birth_date = fake.date_of_birth(minimum_age=20, maximum_age=65)
-    birth_date_str = birth_date.strftime("%d.%m.%Y")
-    
-    # Generate entry date (between 0-10 years ago)
-    entry_date = fake.date_between(start_date="-10y", end_date="today")
-    entry_date_str = entry_date.strftime("%d.%m.%Y")
-    
+# Birth and entry dates are drawn relative to the start of the generated pay
+# year rather than today, so a seed gives the same data on any day
+REFERENCE_DATE = date(2025, 1, 1)
+
+def _sv_nummer(birth_date, last_name, rng=random):
+    """Build an SV-Nummer from the birth date and the initial of the last name."""
     # Format birth date for SV-Nummer (DDMM format - day and month only)
-    birth_date_sv = birth_date.strftime("%d%m")
+    birth_date_sv = f"{birth_date.day:02d}{birth_date.month:02d}"
     
     # Generate SV-Nummer with exactly 8 digits before the letter:
     # - 2 digit agency code (position 1-2)
@@ -32,32 +49,51 @@ def generate_employee_data():
     # - 2 digit counter (position 7-8)
     # - First letter of last name (position 9)
     # - 3 digit serial number (position 10-12)
-    agency_code = f"{random.randint(10, 99)}"
-    counter_digits = f"{random.randint(10, 99)}"
-    serial_number = f"{random.randint(100, 999)}"
+    agency_code = f"{rng.randint(10, 99)}"
+    counter_digits = f"{rng.randint(10, 99)}"
+    serial_number = f"{rng.randint(100, 999)}"
+    
+    return f"{agency_code}{birth_date_sv}{counter_digits}{last_name[0].upper()}{serial_number}"
+
+def generate_employee_data(rng=random, fake=fake, personal_nummer=None):
+    """Generate random employee data using Faker (and rng for the other values).
+    
+    Without a personal_nummer a random one is drawn, which other employees may share.
+    """
+    gender = "Herr" if fake.boolean(chance_of_getting_true=60) else "Frau"
+    first_name = fake.first_name_male() if gender == "Herr" else fake.first_name_female()
+    last_name = fake.last_name()
+    
+    # Generate birth date (between 20-65 years old)
+    birth_date = fake.date_between(start_date=REFERENCE_DATE - timedelta(days=65 * 365), end_date=REFERENCE_DATE - timedelta(days=20 * 365))
+    birth_date_str = birth_date.strftime("%d.%m.%Y")
+    
+    # Generate entry date (between 0-10 years ago)
+    entry_date = fake.date_between(start_date=REFERENCE_DATE - timedelta(days=10 * 365), end_date=REFERENCE_DATE)
+    entry_date_str = entry_date.strftime("%d.%m.%Y")
     
-    sv_nummer = f"{agency_code}{birth_date_sv}{counter_digits}{last_name[0].upper()}{serial_number}"
+    sv_nummer = _sv_nummer(birth_date, last_name, rng)
     
     return {
         "gender": gender,
         "name": f"{first_name} {last_name}",
         "adresse": fake.address().replace('\n', ', '),
-        "personal_nummer": f"22{fake.random_number(digits=6)}",
+        "personal_nummer": personal_nummer or f"22{fake.random_number(digits=6)}",
         "geburtsdatum": birth_date_str,
-        "steuerklasse": str(random.randint(1, 6)),
+        "steuerklasse": str(rng.randint(1, 6)),
         "eintrittsdatum": entry_date_str,
-        "urlaubstage": random.randint(24, 30),
+        "urlaubstage": rng.randint(24, 30),
         "sv_nummer": sv_nummer,
-        "krankenkasse": random.choice(["Techniker KK", "AOK", "Barmer", "DAK", "IKK"]),
+        "krankenkasse": rng.choice(["Techniker KK", "AOK", "Barmer", "DAK", "IKK"]),
         "beitragsgruppenschluessel": "1111",
         "steuer_id": f"{fake.random_number(digits=11)}",
-        "kv_prozentsatz": f"{random.uniform(7.8, 8.5):.2f} %",
+        "kv_prozentsatz": f"{rng.uniform(7.8, 8.5):.2f} %",
         "rv_prozentsatz": "9.30 %",
-        "av_prozentsatz": f"{random.uniform(1.2, 1.3):.2f} %",
-        "pv_prozentsatz": f"{random.uniform(1.7, 1.9):.4f} %",
+        "av_prozentsatz": f"{rng.uniform(1.2, 1.3):.2f} %",
+        "pv_prozentsatz": f"{rng.uniform(1.7, 1.9):.4f} %",
     }
 
-def generate_bank_details():
+def generate_bank_details(fake=fake):
     """Generate random bank details using Faker."""
     return {
         "bank_employee": fake.company() + " Bank",
@@ -66,6 +102,124 @@ def generate_bank_details():
         "Kto": f"{fake.random_number(digits=10)}",
     }
 
+# Number of entries sampled from Faker per identity pool list
+IDENTITY_POOL_SIZE = 10000
+IDENTITY_POOL_VERSION = 1
+
+# Identity pools already loaded in this process, by path
+_identity_pools = {}
+
+def build_identity_pool(size=IDENTITY_POOL_SIZE):
+    """Sample names, addresses and companies from Faker once for the pooled generators."""
+    import faker
+
+    # A fixed seed makes the pool, and so the generated data, the same on every machine
+    pool_fake = faker.Faker('de_DE')
+    pool_fake.seed_instance(IDENTITY_POOL_VERSION)
+    return {
+        "version": IDENTITY_POOL_VERSION,
+        "faker_version": faker.VERSION,
+        "size": size,
+        "first_names_male": [pool_fake.first_name_male() for _ in range(size)],
+        "first_names_female": [pool_fake.first_name_female() for _ in range(size)],
+        "last_names": [pool_fake.last_name() for _ in range(size)],
+        "addresses": [pool_fake.address().replace('\n', ', ') for _ in range(size)],
+        "companies": [pool_fake.company() for _ in range(size)],
+        "street_addresses": [pool_fake.street_address() for _ in range(size)],
+        "postcodes": [pool_fake.postcode() for _ in range(size)],
+        "cities": [pool_fake.city() for _ in range(size)],
+    }
+
+def load_identity_pool(path, size=IDENTITY_POOL_SIZE):
+    """Load the identity pool cached at path (gzipped JSON), building it first if needed."""
+    if path in _identity_pools:
+        return _identity_pools[path]
+    
+    import faker
+
+    pool = None
+    if os.path.exists(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            pool = json.load(f)
+        if (pool.get("version"), pool.get("faker_version"), pool.get("size")) != (IDENTITY_POOL_VERSION, faker.VERSION, size):
+            pool = None
+    
+    if pool is None:
+        print(f"Building identity pool of {size} entries in {path}...")
+        pool = build_identity_pool(size)
+        # Write to a temporary file first so concurrent readers never see a partial pool
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(pool, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+    
+    _identity_pools[path] = pool
+    return pool
+
+def _steuer_id(rng=random):
+    """Generate a valid 11 digit Steuer-ID (one digit repeated, ISO 7064 check digit)."""
+    # The first ten digits use nine different digits, one of them twice, and never start with 0
+    digits = rng.sample(range(10), 10)
+    duplicate, replaced = rng.sample(range(10), 2)
+    digits[replaced] = digits[duplicate]
+    if digits[0] == 0:
+        other = rng.choice([i for i, digit in enumerate(digits) if digit != 0])
+        digits[0], digits[other] = digits[other], digits[0]
+    
+    product = 10
+    for digit in digits:
+        total = (digit + product) % 10 or 10
+        product = total * 2 % 11
+    check_digit = (11 - product) % 10
+    return "".join(map(str, digits)) + str(check_digit)
+
+def _german_iban(bankleitzahl, kontonummer):
+    """Build a German IBAN from an 8 digit Bankleitzahl and a 10 digit account number."""
+    bban = f"{bankleitzahl}{kontonummer}"
+    # "DE00" moved to the end, letters as numbers (D=13, E=14)
+    check_digits = 98 - int(f"{bban}131400") % 97
+    return f"DE{check_digits:02d}{bban}"
+
+def generate_pooled_employee_data(pool, rng=random, personal_nummer=None):
+    """Generate random employee data by sampling from an identity pool (see generate_employee_data)."""
+    gender = "Herr" if rng.random() < 0.6 else "Frau"
+    first_name = rng.choice(pool["first_names_male"] if gender == "Herr" else pool["first_names_female"])
+    last_name = rng.choice(pool["last_names"])
+    
+    # Birth date between 20-65 years ago, entry date between 0-10 years ago
+    birth_date = REFERENCE_DATE - timedelta(days=rng.randint(20 * 365, 65 * 365))
+    entry_date = REFERENCE_DATE - timedelta(days=rng.randint(0, 10 * 365))
+    
+    return {
+        "gender": gender,
+        "name": f"{first_name} {last_name}",
+        "adresse": rng.choice(pool["addresses"]),
+        "personal_nummer": personal_nummer or f"22{rng.randint(0, 999999)}",
+        "geburtsdatum": f"{birth_date.day:02d}.{birth_date.month:02d}.{birth_date.year}",
+        "steuerklasse": str(rng.randint(1, 6)),
+        "eintrittsdatum": f"{entry_date.day:02d}.{entry_date.month:02d}.{entry_date.year}",
+        "urlaubstage": rng.randint(24, 30),
+        "sv_nummer": _sv_nummer(birth_date, last_name, rng),
+        "krankenkasse": rng.choice(["Techniker KK", "AOK", "Barmer", "DAK", "IKK"]),
+        "beitragsgruppenschluessel": "1111",
+        "steuer_id": _steuer_id(rng),
+        "kv_prozentsatz": f"{rng.uniform(7.8, 8.5):.2f} %",
+        "rv_prozentsatz": "9.30 %",
+        "av_prozentsatz": f"{rng.uniform(1.2, 1.3):.2f} %",
+        "pv_prozentsatz": f"{rng.uniform(1.7, 1.9):.4f} %",
+    }
+
+def generate_pooled_bank_details(pool, rng=random):
+    """Generate random bank details by sampling from an identity pool."""
+    bankleitzahl = f"{rng.randint(10000000, 99999999)}"
+    kontonummer = f"{rng.randint(0, 9999999999):010d}"
+    return {
+        "bank_employee": rng.choice(pool["companies"]) + " Bank",
+        "iban_employee": _german_iban(bankleitzahl, kontonummer),
+        "bankleitzahl": bankleitzahl,
+        "Kto": kontonummer,
+    }
+
 def calculate_financial_data(base_salary):
     """Calculate financial data based on base salary."""
     # Slightly higher than base for gross
@@ -98,69 +252,172 @@ def calculate_financial_data(base_salary):
     additional_deductions = 49.74  # GWV KV + insurance + benefits
     auszahlungsbetrag = round(netto_verdienst - additional_deductions, 2)
     
-    # Create the financial data structure
+    return _financial_record({
+        "betrag": base_salary,
+        "gesamt_brutto": gesamt_brutto,
+        "steuer_brutto": steuer_brutto,
+        "lohnsteuer": lohnsteuer,
+        "kv_brutto": kv_brutto,
+        "kv_beitrag": kv_beitrag,
+        "rv_beitrag": rv_beitrag,
+        "av_beitrag": av_beitrag,
+        "pv_beitrag": pv_beitrag,
+        "sv_total": round(sv_total, 2),
+        "netto_verdienst": netto_verdienst,
+        "auszahlungsbetrag": auszahlungsbetrag,
+    })
+
+def _financial_record(values):
+    """Build the financial data structure from the calculated values of one month.
+    
+    The year-to-date figures in jahresübersicht are the month's own; the
+    generator replaces them with the running totals of the employee's year
+    (see payslip_ytd.YearToDate).
+    """
     return {
         "verdienst": {
             "lohn_art": "Grundgehalt",
             "lohn_bezeichnung": "Monatsgehalt",
-            "betrag": base_salary,
-            "gesamt_brutto": gesamt_brutto,
+            "betrag": values["betrag"],
+            "gesamt_brutto": values["gesamt_brutto"],
         },
         "steuern_sozialversicherung": {
-            "steuer_brutto": steuer_brutto,
-            "steuerrechtliche_abzüge": lohnsteuer,
-            "lohnsteuer": lohnsteuer,
-            "kv_brutto": kv_brutto,
-            "rv_brutto": rv_brutto,
-            "av_brutto": av_brutto,
-            "pv_brutto": kv_brutto,
-            "kv_beitrag": kv_beitrag,
-            "rv_beitrag": rv_beitrag,
-            "av_beitrag": av_beitrag,
-            "pv_beitrag": pv_beitrag,
-            "sv_rechtliche_abzüge": round(sv_total, 2),
-            "netto_verdienst": netto_verdienst,
+            "steuer_brutto": values["steuer_brutto"],
+            "steuerrechtliche_abzüge": values["lohnsteuer"],
+            "lohnsteuer": values["lohnsteuer"],
+            "kv_brutto": values["kv_brutto"],
+            # Rentenversicherung and Arbeitslosenversicherung are based on the tax gross,
+            # Pflegeversicherung on the Krankenversicherung gross
+            "rv_brutto": values["steuer_brutto"],
+            "av_brutto": values["steuer_brutto"],
+            "pv_brutto": values["kv_brutto"],
+            "kv_beitrag": values["kv_beitrag"],
+            "rv_beitrag": values["rv_beitrag"],
+            "av_beitrag": values["av_beitrag"],
+            "pv_beitrag": values["pv_beitrag"],
+            "sv_rechtliche_abzüge": values["sv_total"],
+            "netto_verdienst": values["netto_verdienst"],
         },
         "be_und_abzuege": {"gruppenunfallversicherung": "6,57"},
         "jahresübersicht": {
-            "gesamt_jahres_brutto": round(gesamt_brutto * 12, 2),
-            "gesamt_steuer_brutto": round(steuer_brutto * 12, 2),
-            "lohnsteuer": round(lohnsteuer * 12, 2),
+            "gesamt_jahres_brutto": values["gesamt_brutto"],
+            "gesamt_steuer_brutto": values["steuer_brutto"],
+            "lohnsteuer": values["lohnsteuer"],
             "kirchensteuer": 0.00,
             "solidaritätszuschlag": 0.60,
             "steuerfreie_bezüge": 0.00,
-            "sv_brutto": round(rv_brutto * 12, 2),
-            "kv_beitrag": round(kv_beitrag * 12, 2),
-            "rv_beitrag": round(rv_beitrag * 12, 2),
-            "av_beitrag": round(av_beitrag * 12, 2),
-            "pv_beitrag": round(pv_beitrag * 12, 2),
+            "sv_brutto": values["steuer_brutto"],
+            "kv_beitrag": values["kv_beitrag"],
+            "rv_beitrag": values["rv_beitrag"],
+            "av_beitrag": values["av_beitrag"],
+            "pv_beitrag": values["pv_beitrag"],
+            "kv_brutto": values["kv_brutto"],
+            "av_brutto": values["steuer_brutto"],
+            "sv_ag_anteil": 1.05,
         },
         "zahlungsdetails": {
             "sv_ag_anteil": 1.05,
-            "auszahlungsbetrag": auszahlungsbetrag,
+            "auszahlungsbetrag": values["auszahlungsbetrag"],
         },
     }
 
-def generate_payslip_data(base_salary=None):
-    """Generate complete payslip data for one employee and one month."""
+def _round_cents(values):
+    """Round an array to cents exactly like the built-in round(value, 2)."""
+    import numpy as np
+
+    scaled = values * 100
+    rounded = np.round(scaled) / 100
+    # Scaling can move a value that sits on a half cent to either side of it;
+    # let round() decide those few from the exact float value
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+def calculate_financial_data_batch(base_salaries):
+    """Calculate the financial values for many base salaries at once.
+
+    Returns a dict of NumPy column arrays with the same values (to the cent)
+    as calculate_financial_data; use financial_data_records to turn it into
+    per-month dicts.
+    """
+    import numpy as np
+
+    betrag = np.asarray(base_salaries, dtype=np.float64)
+    gesamt_brutto = _round_cents(betrag * 1.0083)
+    steuer_brutto = _round_cents(betrag * 1.0005)
+    lohnsteuer = _round_cents(steuer_brutto * 0.118)
+    kv_brutto = _round_cents(betrag * 0.9187)
+    kv_beitrag = _round_cents(kv_brutto * 0.0825)
+    rv_beitrag = _round_cents(steuer_brutto * 0.093)
+    av_beitrag = _round_cents(steuer_brutto * 0.013)
+    pv_beitrag = _round_cents(kv_brutto * 0.018)
+    # Same summation order as the scalar version so the floats match exactly
+    sv_total = kv_beitrag + rv_beitrag + av_beitrag + pv_beitrag
+    netto_verdienst = _round_cents(gesamt_brutto - lohnsteuer - sv_total)
+    return {
+        "betrag": betrag,
+        "gesamt_brutto": gesamt_brutto,
+        "steuer_brutto": steuer_brutto,
+        "lohnsteuer": lohnsteuer,
+        "kv_brutto": kv_brutto,
+        "kv_beitrag": kv_beitrag,
+        "rv_beitrag": rv_beitrag,
+        "av_beitrag": av_beitrag,
+        "pv_beitrag": pv_beitrag,
+        "sv_total": _round_cents(sv_total),
+        "netto_verdienst": netto_verdienst,
+        "auszahlungsbetrag": _round_cents(netto_verdienst - 49.74),
+    }
+
+def financial_data_records(columns, base_salaries=None):
+    """Yield the financial data dict of each row of calculate_financial_data_batch columns."""
+    names = list(columns)
+    values = [columns[name].tolist() for name in names]
+    if base_salaries is not None:
+        # Keep the salaries exactly as passed in (calculate_financial_data does not convert them)
+        values[names.index("betrag")] = list(base_salaries)
+    for row in zip(*values):
+        yield _financial_record(dict(zip(names, row)))
+
+def generate_payslip_data(base_salary=None, pool=None, rng=random, fake=fake, personal_nummer=None):
+    """Generate complete payslip data for one employee and one month.
+    
+    With an identity pool (see load_identity_pool) names, addresses and
+    companies are sampled from the pool instead of calling Faker. Random
+    values come from rng and fake, the global random module and the shared
+    Faker instance by default. Without a personal_nummer a random one is drawn.
+    """
     # Company data - could be made variable too
-    company_data = {
-        "arbeitgeber": {
-            "unternehmen": fake.company(),
-            "unternehmen_adresse": fake.street_address() + ", " + fake.postcode() + " " + fake.city(),
-            "kostenstelle": f"SV{fake.random_number(digits=6)}",
+    if pool is None:
+        company_data = {
+            "arbeitgeber": {
+                "unternehmen": fake.company(),
+                "unternehmen_adresse": fake.street_address() + ", " + fake.postcode() + " " + fake.city(),
+                "kostenstelle": f"SV{fake.random_number(digits=6)}",
+            }
+        }
+    else:
+        company_data = {
+            "arbeitgeber": {
+                "unternehmen": rng.choice(pool["companies"]),
+                "unternehmen_adresse": f"{rng.choice(pool['street_addresses'])}, {rng.choice(pool['postcodes'])} {rng.choice(pool['cities'])}",
+                "kostenstelle": f"SV{rng.randint(0, 999999)}",
+            }
         }
-    }
     
     # Generate random employee data
-    employee_data = {"arbeitnehmer": generate_employee_data()}
+    if pool is None:
+        employee_data = {"arbeitnehmer": generate_employee_data(rng, fake, personal_nummer)}
+    else:
+        employee_data = {"arbeitnehmer": generate_pooled_employee_data(pool, rng, personal_nummer)}
     
     # Generate random bank details
-    bank_details = generate_bank_details()
+    bank_details = generate_bank_details(fake) if pool is None else generate_pooled_bank_details(pool, rng)
     
     # If no base salary provided, generate one
     if base_salary is None:
-        base_salary = round(random.uniform(3000, 8000), 2)
+        base_salary = round(rng.uniform(3000, 8000), 2)
     
     # Calculate financial data based on the base salary
     financial_data = calculate_financial_data(base_salary)
@@ -182,62 +439,289 @@ def generate_payslip_data(base_salary=None):
     
     return payslip_data
 
-def generate_test_data(num_employees=5, months_per_employee=3, output_dir="test_data"):
-    """Generate test data for multiple employees across multiple months."""
-    # Create output directory
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+# Employees per shard; each shard is seeded on its own and its salaries are calculated in one batch
+SHARD_EMPLOYEES = 256
+
+def _compose_month(base_data, month_str, financial_data):
+    """Compose one month's payslip from the shared employee base and the month's values.
     
-    all_datasets = []
+    Only the month-specific parts are new dicts; employer, employee and bank
+    details are shared with base_data (and every other month), so they must
+    not be modified. Key order matches base_data, so the JSON is unchanged.
+    """
+    return {
+        **base_data,
+        "abrechnungsdetails": {
+            **base_data["abrechnungsdetails"],
+            "pay_period": f"{month_str} / 2025",
+            "payroll_date": f"31.{month_str}.2025",
+        },
+        "verdienst": financial_data["verdienst"],
+        "steuern_sozialversicherung": financial_data["steuern_sozialversicherung"],
+        "jahresübersicht": financial_data["jahresübersicht"],
+        "zahlungsdetails": {
+            **base_data["zahlungsdetails"],
+            "auszahlungsbetrag": financial_data["zahlungsdetails"]["auszahlungsbetrag"],
+        },
+    }
+
+def _employee_months(batch, months_per_employee):
+    """Calculate the monthly financial data of a batch of employees at once.
     
-    for emp_id in range(num_employees):
-        employee_dir = f"{output_dir}/employee_{emp_id+1}"
-        if not os.path.exists(employee_dir):
-            os.makedirs(employee_dir)
-        
-        # Generate base data for this employee
-        base_data = generate_payslip_data()
-        base_salary = base_data["verdienst"]["betrag"]
-        
+    Yields (employee_dir, base_data, months) per employee, where months is a
+    list of (month_str, month_data). The jahresübersicht of every month holds
+    the employee's year-to-date totals through that month.
+    """
+    salaries = [salary for _, _, month_salaries in batch for salary in month_salaries]
+    records = financial_data_records(calculate_financial_data_batch(salaries), salaries)
+    
+    for employee_dir, base_data, month_salaries in batch:
+        months = []
+        year_to_date = YearToDate()
+        for month, financial_data in zip(range(1, months_per_employee + 1), records):
+            month_str = f"{month:02d}"
+            month_data = _compose_month(base_data, month_str, financial_data)
+            month_data["jahresübersicht"] = {**month_data["jahresübersicht"], **year_to_date.add(month_data)}
+            months.append((month_str, month_data))
+        yield employee_dir, base_data, months
+
+def _write_employee_batch(batch, months_per_employee, all_datasets):
+    """Write the payslips of a batch of employees as one JSON file per employee and month."""
+    for employee_dir, base_data, months in _employee_months(batch, months_per_employee):
         employee_payslips = []
         
-        # Generate data for each month
-        for month in range(1, months_per_employee + 1):
-            # Create a copy for this month
-            month_data = copy.deepcopy(base_data)
-            
-            # Update month-specific information
-            month_str = f"{month:02d}"
-            month_data["abrechnungsdetails"]["pay_period"] = f"{month_str} / 2025"
-            month_data["abrechnungsdetails"]["payroll_date"] = f"31.{month_str}.2025"
-            
-            # Optional: slight salary variation per month
-            monthly_variation = round(random.uniform(-100, 100), 2)
-            month_salary = max(2000, base_salary + monthly_variation)  # Ensure minimum wage
-            
-            # Recalculate financial data if salary varies
-            if monthly_variation != 0:
-                financial_data = calculate_financial_data(month_salary)
-                # Update financial parts of the data
-                month_data["verdienst"] = financial_data["verdienst"]
-                month_data["steuern_sozialversicherung"] = financial_data["steuern_sozialversicherung"]
-                month_data["jahresübersicht"] = financial_data["jahresübersicht"]
-                month_data["zahlungsdetails"]["auszahlungsbetrag"] = financial_data["zahlungsdetails"]["auszahlungsbetrag"]
-            
+        for month_str, month_data in months:
             # Create filename based on employee name
-            clean_name = month_data["arbeitnehmer"]["name"].replace(' ', '_')
+            clean_name = base_data["arbeitnehmer"]["name"].replace(' ', '_')
             json_filename = f"{employee_dir}/payslip_{clean_name}_{month_str}_2025.json"
             
-            # Save as JSON
+            # Save as JSON (serialised in one go; json.dump writes many small chunks)
             with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(month_data, f, ensure_ascii=False, indent=2)
+                f.write(json.dumps(month_data, ensure_ascii=False, indent=2))
             
             # Record the filename
             employee_payslips.append(json_filename)
         
         all_datasets.append(employee_payslips)
         print(f"Generated {months_per_employee} payslips for {base_data['arbeitnehmer']['name']}")
+
+def _jsonl_employee_batch(batch, months_per_employee):
+    """Return the payslips of a batch of employees as compact JSON Lines records."""
+    return [
+        json.dumps(month_data, ensure_ascii=False, separators=(',', ':')) + "\n"
+        for _, _, months in _employee_months(batch, months_per_employee)
+        for _, month_data in months
+    ]
+
+# File name suffix per JSON Lines compression
+JSONL_COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Default number of records per JSON Lines shard file
+JSONL_SHARD_SIZE = 100000
+
+# Bytes collected before a JSON Lines shard file is written to
+JSONL_WRITE_BUFFER = 1 << 20
+
+class JsonlShardWriter:
+    """Write JSON Lines records into numbered shard files of at most shard_size records each.
+    
+    Records are buffered and written in blocks of about JSONL_WRITE_BUFFER bytes,
+    optionally gzip or zstd compressed.
+    """
+    
+    def __init__(self, output_dir, shard_size=JSONL_SHARD_SIZE, compression="none"):
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.compression = compression
+        self.files = []
+        self._file = None
+        self._records = 0
+        self._buffer = []
+        self._buffered = 0
+    
+    def _open(self):
+        path = os.path.join(self.output_dir, f"payslips-{len(self.files):05d}.jsonl{JSONL_COMPRESSION_SUFFIXES[self.compression]}")
+        if self.compression == "gzip":
+            # A fixed mtime keeps the compressed files reproducible
+            self._file = gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0)
+        elif self.compression == "zstd":
+            self._file = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+        else:
+            self._file = open(path, 'wb')
+        self.files.append(path)
+        self._records = 0
+    
+    def _flush(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer).encode("utf-8"))
+            self._buffer = []
+            self._buffered = 0
+    
+    def write(self, line):
+        """Write one record (a line of JSON ending in a newline)."""
+        if self._file is None or self._records == self.shard_size:
+            self.close()
+            self._open()
+        self._buffer.append(line)
+        self._buffered += len(line)
+        self._records += 1
+        if self._buffered >= JSONL_WRITE_BUFFER:
+            self._flush()
+    
+    def close(self):
+        """Write out the buffered records and close the current shard file."""
+        if self._file is not None:
+            self._flush()
+            self._file.close()
+            self._file = None
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _shard_seed(seed, shard):
+    """Derive the seed of one shard of employees from the run seed."""
+    digest = hashlib.sha256(f"{seed}:{shard}".encode("ascii")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def _shard_batch(shard, first_employee, num_employees, months_per_employee, output_dir, seed, pool):
+    """Generate the base data and monthly salaries of one shard of employees with its own seeded generators."""
+    # Every shard has its own generators seeded by (seed, shard), so its output
+    # does not depend on which process or thread runs it or what ran before,
+    # and the global random module and shared Faker are left alone
+    shard_seed = _shard_seed(seed, shard)
+    rng = random.Random(shard_seed)
+    shard_fake = None
+    if pool is None:
+        shard_fake = _LazyFaker('de_DE')
+        shard_fake.seed_instance(shard_seed)
+    
+    batch = []
+    for emp_id in range(first_employee, first_employee + num_employees):
+        employee_dir = f"{output_dir}/employee_{emp_id+1}"
+        
+        # Generate base data for this employee; the personal number follows the
+        # employee number, so no two employees of a run share one
+        base_data = generate_payslip_data(pool=pool, rng=rng, fake=shard_fake, personal_nummer=f"22{emp_id + 1:06d}")
+        base_salary = base_data["verdienst"]["betrag"]
+        
+        # Slight salary variation per month; a month without variation gets
+        # the same figures as the base data
+        month_salaries = []
+        for month in range(1, months_per_employee + 1):
+            monthly_variation = round(rng.uniform(-100, 100), 2)
+            month_salaries.append(max(2000, base_salary + monthly_variation))  # Ensure minimum wage
+        
+        batch.append((employee_dir, base_data, month_salaries))
+    return batch
+
+def _generate_shard(job):
+    """Generate the payslips of one shard of employees (runs in worker processes)."""
+    shard, first_employee, num_employees, months_per_employee, output_dir, seed, identity_pool, output_format = job
+    pool = load_identity_pool(*identity_pool) if identity_pool else None
+    batch = _shard_batch(shard, first_employee, num_employees, months_per_employee, output_dir, seed, pool)
+    
+    if output_format == "jsonl":
+        return _jsonl_employee_batch(batch, months_per_employee)
+    
+    for employee_dir, _, _ in batch:
+        if not os.path.exists(employee_dir):
+            os.makedirs(employee_dir)
+    shard_datasets = []
+    _write_employee_batch(batch, months_per_employee, shard_datasets)
+    return shard_datasets
+
+# Shards per worker process that may be generated ahead of the one being written
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+def _map_shards(jobs, workers):
+    """Yield the result of every shard job in order, generating shards in worker processes.
+    
+    At most SHARDS_IN_FLIGHT_PER_WORKER shards per worker are submitted ahead,
+    so generated records do not pile up in this process while writing them
+    is slower than generating them.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(_generate_shard, jobs)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(_generate_shard, job))
+            if len(pending) >= workers * SHARDS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def iter_payslip_records(num_employees=5, months_per_employee=3, seed=None, identity_pool=None, pool_size=IDENTITY_POOL_SIZE):
+    """Yield the payslip records generate_test_data would write for the same seed, in order.
+    
+    Records are generated one shard of employees at a time, so memory use does
+    not grow with the number of employees.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    pool = load_identity_pool(identity_pool, pool_size) if identity_pool else None
+    
+    for shard, first_employee in enumerate(range(0, num_employees, SHARD_EMPLOYEES)):
+        batch = _shard_batch(shard, first_employee, min(SHARD_EMPLOYEES, num_employees - first_employee), months_per_employee, "", seed, pool)
+        for _, _, months in _employee_months(batch, months_per_employee):
+            for _, month_data in months:
+                yield month_data
+
+def generate_test_data(num_employees=5, months_per_employee=3, output_dir="test_data", seed=None, workers=1,
+                       identity_pool=None, pool_size=IDENTITY_POOL_SIZE, output_format="json",
+                       shard_size=JSONL_SHARD_SIZE, compression="none"):
+    """Generate test data for multiple employees across multiple months.
+    
+    Employees are generated in shards of SHARD_EMPLOYEES, each seeded
+    from (seed, shard), so the same seed gives identical files for any number
+    of workers. Without a seed a random one is used. With identity_pool (a
+    path to the cached pool file) identities are sampled from the pool.
+    
+    With output_format "jsonl" the records are written compactly into
+    payslips-NNNNN.jsonl shard files of shard_size records (optionally gzip
+    or zstd compressed) and the list of those files is returned; otherwise
+    one JSON file per employee and month is written and a list of file
+    lists per employee is returned.
+    """
+    # Create output directory
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    
+    if identity_pool:
+        # Build the pool once here rather than in every worker
+        load_identity_pool(identity_pool, pool_size)
+        identity_pool = (identity_pool, pool_size)
+    
+    jobs = [
+        (shard, first_employee, min(SHARD_EMPLOYEES, num_employees - first_employee), months_per_employee, output_dir, seed, identity_pool, output_format)
+        for shard, first_employee in enumerate(range(0, num_employees, SHARD_EMPLOYEES))
+    ]
+    
+    results = _map_shards(jobs, workers)
+    if output_format == "jsonl":
+        with JsonlShardWriter(output_dir, shard_size, compression) as writer:
+            for lines in results:
+                for line in lines:
+                    writer.write(line)
+                print(f"Generated {len(lines)} payslips")
+        return writer.files
+    
+    all_datasets = []
+    for shard_datasets in results:
+        all_datasets.extend(shard_datasets)
     return all_datasets
 
 if __name__ == "__main__":
@@ -247,15 +731,34 @@ if __name__ == "__main__":
     parser.add_argument('--employees', type=int, default=5, help='Number of employees')
     parser.add_argument('--months', type=int, default=3, help='Number of months per employee')
     parser.add_argument('--output', type=str, default='test_data', help='Output directory')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible output (default: random)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+    parser.add_argument('--identity-pool', type=str, default=None, help='Sample identities from the pool cached in this file (built if missing) instead of calling Faker per record')
+    parser.add_argument('--pool-size', type=int, default=IDENTITY_POOL_SIZE, help='Entries per identity pool list')
+    parser.add_argument('--format', choices=['json', 'jsonl'], default='json', help='One pretty-printed JSON file per payslip, or compact JSON Lines shard files')
+    parser.add_argument('--shard-size', type=int, default=JSONL_SHARD_SIZE, help='Records per JSON Lines shard file')
+    parser.add_argument('--compression', choices=sorted(JSONL_COMPRESSION_SUFFIXES), default='none', help='Compression of JSON Lines shard files')
     
     args = parser.parse_args()
+    if args.compression == "zstd" and zstandard is None:
+        parser.error("--compression zstd requires the zstandard package")
     
     print(f"Generating test data for {args.employees} employees with {args.months} months each...")
     datasets = generate_test_data(
         num_employees=args.employees, 
         months_per_employee=args.months, 
-        output_dir=args.output
+        output_dir=args.output,
+        seed=args.seed,
+        workers=args.workers,
+        identity_pool=args.identity_pool,
+        pool_size=args.pool_size,
+        output_format=args.format,
+        shard_size=args.shard_size,
+        compression=args.compression,
     )
     
-    print(f"Done! Generated {len(datasets)} employee datasets with {args.months} months each.")
+    if args.format == "jsonl":
+        print(f"Done! Wrote {args.employees * args.months} payslips to {len(datasets)} JSON Lines files.")
+    else:
+        print(f"Done! Generated {len(datasets)} employee datasets with {args.months} months each.")
     print(f"Output directory: {args.output}/")
\ No newline at end of file
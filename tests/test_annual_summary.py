@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from salary_template_generator import generate_pdfs_from_json, iter_annual_summaries, iter_json_files
+from test_data_generator import iter_payslip_records
+
+
+def _write_records(root, directory_of):
+    for record in iter_payslip_records(2, 3, seed=1):
+        month = record["abrechnungsdetails"]["pay_period"].split(" / ")[0]
+        directory = root / directory_of(record, month)
+        directory.mkdir(exist_ok=True)
+        (directory / f"payslip_{record['arbeitnehmer']['personal_nummer']}_{month}.json").write_text(json.dumps(record))
+
+
+def _summaries(root):
+    summary = {"processed": 0, "failed": []}
+    return list(iter_annual_summaries(iter_json_files(str(root)), summary))
+
+
+def test_generated_employees_have_unique_personal_numbers():
+    numbers = {record["arbeitnehmer"]["personal_nummer"] for record in iter_payslip_records(600, 1, seed=1)}
+    assert len(numbers) == 600
+
+
+def test_annual_summaries_fold_each_employee_directory(tmp_path):
+    _write_records(tmp_path, lambda record, month: f"employee_{record['arbeitnehmer']['personal_nummer']}")
+    assert [sorted(annual["months"]) for annual in _summaries(tmp_path)] == [[1, 2, 3], [1, 2, 3]]
+
+
+def test_annual_summaries_keep_employees_sharing_a_personal_number_apart(tmp_path):
+    records = list(iter_payslip_records(2, 3, seed=1))
+    for record in records:
+        directory = tmp_path / "td" / f"employee_{records.index(record) // 3 + 1}"
+        directory.mkdir(parents=True, exist_ok=True)
+        month = record["abrechnungsdetails"]["pay_period"][:2]
+        record["arbeitnehmer"]["personal_nummer"] = "22000001"
+        (directory / f"payslip_{month}.json").write_text(json.dumps(record))
+    summary = generate_pdfs_from_json(str(tmp_path / "td"), str(tmp_path / "out"), workers=1, annual_summary=True)
+    assert summary["failed"] == []
+    assert sorted(path.relative_to(tmp_path / "out").as_posix() for path in (tmp_path / "out").rglob("*.pdf")) == [
+        "employee_1/jahresuebersicht_22000001_2025.pdf",
+        "employee_2/jahresuebersicht_22000001_2025.pdf",
+    ]
+
+
+def test_annual_summaries_reject_one_directory_per_month(tmp_path):
+    _write_records(tmp_path, lambda record, month: f"m{month}")
+    with pytest.raises(ValueError, match="holds the payslips of more than one employee"):
+        _summaries(tmp_path)
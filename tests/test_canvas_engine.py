@@ -0,0 +1,60 @@
+import copy
+import io
+
+import pytest
+
+import payslip_render
+from test_data_generator import iter_payslip_records
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def _raster(pdf_bytes):
+    """Rasterise every page of a PDF, so the engines are compared by what they draw."""
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as document:
+        return [page.get_pixmap(dpi=100).samples for page in document]
+
+
+def _assert_same_rendering(data):
+    platypus = _raster(payslip_render.render_payslip_bytes(data, "platypus"))
+    canvas = _raster(payslip_render.render_payslip_bytes(data, "canvas"))
+    assert canvas == platypus
+
+
+@pytest.mark.parametrize("record", list(iter_payslip_records(3, 2, seed=7)))
+def test_canvas_matches_platypus_for_generated_records(record):
+    _assert_same_rendering(record)
+
+
+@pytest.mark.parametrize("section, key, fits", [
+    # Header paragraphs wrap in platypus, so the canvas engine hands these over
+    ("arbeitgeber", "unternehmen", False),
+    ("arbeitgeber", "unternehmen_adresse", False),
+    ("arbeitnehmer", "name", False),
+    ("arbeitnehmer", "adresse", False),
+    # Table cells run over in both engines
+    ("arbeitnehmer", "krankenkasse", True),
+    ("zahlungsdetails", "bank_employee", True),
+])
+def test_canvas_matches_platypus_for_long_values(section, key, fits):
+    data = copy.deepcopy(next(iter_payslip_records(1, 1, seed=11)))
+    data[section][key] = " ".join([data[section][key]] * 6)
+    assert payslip_render.fits_canvas_layout(data) is fits
+    _assert_same_rendering(data)
+
+
+def test_canvas_matches_platypus_for_markup():
+    data = copy.deepcopy(next(iter_payslip_records(1, 1, seed=11)))
+    data["arbeitgeber"]["unternehmen"] = "Müller &amp; Söhne <i>GmbH</i>"
+    _assert_same_rendering(data)
+
+
+def test_canvas_bundle_matches_platypus_bundle():
+    records = list(iter_payslip_records(3, 1, seed=5))
+    rasters = {}
+    for engine, create_bundle in payslip_render.BUNDLE_ENGINES.items():
+        buffer = io.BytesIO()
+        create_bundle(buffer, records)
+        rasters[engine] = _raster(buffer.getvalue())
+    assert len(rasters["canvas"]) == 3
+    assert rasters["canvas"] == rasters["platypus"]
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from test_data_generator import calculate_financial_data, calculate_financial_data_batch, financial_data_records
+
+# Salaries where the products land on or next to a half cent
+HALF_CENT_SALARIES = [0.005, 0.015, 1.005, 2.675, 1000.005, 1234.565, 2500.125, 4500.0, 99999.995]
+
+
+def _assert_batch_matches_scalar(salaries):
+    batch = list(financial_data_records(calculate_financial_data_batch(salaries), salaries))
+    assert batch == [calculate_financial_data(salary) for salary in salaries]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_batch_matches_scalar_for_random_salaries(seed):
+    rng = random.Random(seed)
+    # Rounded like generated base salaries, and monthly salaries with a rounded variation on top
+    salaries = [round(rng.uniform(3000, 8000), 2) for _ in range(10000)]
+    salaries += [salary + round(rng.uniform(-100, 100), 2) for salary in salaries]
+    _assert_batch_matches_scalar(salaries)
+
+
+def test_batch_matches_scalar_for_every_cent():
+    _assert_batch_matches_scalar([cents / 100 for cents in range(300000, 320000)])
+
+
+def test_batch_matches_scalar_for_half_cents():
+    _assert_batch_matches_scalar(HALF_CENT_SALARIES)
@@ -0,0 +1,53 @@
+import datetime
+import random
+
+import faker.providers.date_time
+import pytest
+
+import test_data_generator
+
+
+def test_same_seed_gives_same_records():
+    first = list(test_data_generator.iter_payslip_records(3, 2, seed=42))
+    second = list(test_data_generator.iter_payslip_records(3, 2, seed=42))
+    assert first == second
+
+
+def test_generation_leaves_global_random_state_alone():
+    random.seed(1)
+    state = random.getstate()
+    list(test_data_generator.iter_payslip_records(2, 2, seed=3))
+    assert random.getstate() == state
+
+
+class _Frozen(type):
+    """Lets the frozen classes pass isinstance checks for real dates."""
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, cls.__mro__[1])
+
+
+class _FrozenDate(datetime.date, metaclass=_Frozen):
+    @classmethod
+    def today(cls):
+        return datetime.date(2031, 7, 15)
+
+
+class _FrozenDatetime(datetime.datetime, metaclass=_Frozen):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.datetime(2031, 7, 15, 12, 0, tzinfo=tz)
+
+    @classmethod
+    def today(cls):
+        return datetime.datetime(2031, 7, 15, 12, 0)
+
+
+@pytest.mark.parametrize("pooled", [False, True])
+def test_same_seed_gives_same_records_on_another_day(tmp_path, monkeypatch, pooled):
+    options = {"identity_pool": str(tmp_path / "pool.json.gz"), "pool_size": 20} if pooled else {}
+    today = list(test_data_generator.iter_payslip_records(3, 2, seed=42, **options))
+    for module in (faker.providers.date_time, test_data_generator):
+        monkeypatch.setattr(module, "dtdate", _FrozenDate, raising=False)
+        monkeypatch.setattr(module, "datetime", _FrozenDatetime, raising=False)
+    assert list(test_data_generator.iter_payslip_records(3, 2, seed=42, **options)) == today
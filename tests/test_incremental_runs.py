@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import salary_template_generator
+from salary_template_generator import generate_pdfs_from_json, jsonl_files, validate_inputs
+from test_data_generator import generate_test_data
+
+SCRIPT = salary_template_generator.__file__
+
+
+def _generate(tmp_path):
+    data_dir = str(tmp_path / "td")
+    generate_test_data(2, 2, output_dir=data_dir, seed=3)
+    return data_dir
+
+
+def test_second_run_into_the_input_directory_skips_every_payslip(tmp_path):
+    data_dir = _generate(tmp_path)
+    first = generate_pdfs_from_json(data_dir, workers=1)
+    second = generate_pdfs_from_json(data_dir, workers=1)
+    assert len(first["succeeded"]) == 4 and first["failed"] == []
+    assert (second["processed"], second["succeeded"], len(second["skipped"]), second["failed"]) == (4, [], 4, [])
+    assert os.path.exists(os.path.join(data_dir, "payslip_manifest.json"))
+
+
+def test_run_journal_does_not_turn_the_input_directory_into_json_lines(tmp_path):
+    data_dir = _generate(tmp_path)
+    generate_pdfs_from_json(data_dir, workers=1)
+    assert os.path.exists(os.path.join(data_dir, "payslip_journal.jsonl"))
+    assert jsonl_files(data_dir) == []
+    assert validate_inputs(data_dir, workers=1) == {"checked": 4, "invalid": []}
+    resumed = generate_pdfs_from_json(data_dir, workers=1, resume=True)
+    assert (resumed["processed"], resumed["failed"]) == (4, [])
+
+
+def test_second_cli_run_on_the_generated_directory(tmp_path):
+    data_dir = _generate(tmp_path)
+    for arguments in ([], [], ["--resume"], ["--retry-failed"], ["--shard", "0/2"], ["--annual-summary"], ["--validate-only"]):
+        result = subprocess.run(
+            [sys.executable, SCRIPT, "--input", data_dir, "--workers", "1"] + arguments,
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "JSON Lines" not in result.stdout
+        assert "(0 invalid)" in result.stdout or " 0 failed)" in result.stdout
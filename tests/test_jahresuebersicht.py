@@ -0,0 +1,31 @@
+import pytest
+
+import payslip_render
+from payslip_render import format_currency
+from salary_template_generator import check_payslip
+from test_data_generator import iter_payslip_records
+
+pymupdf = pytest.importorskip("pymupdf")
+
+# Running totals the Data Generator did not write before the Jahreswert column used them
+NEW_YTD_FIELDS = ["kv_brutto", "av_brutto", "sv_ag_anteil"]
+
+
+def _older_record(drop_section=False):
+    data = next(iter_payslip_records(1, 1, seed=9))
+    if drop_section:
+        del data["jahresübersicht"]
+    else:
+        for field in NEW_YTD_FIELDS:
+            del data["jahresübersicht"][field]
+    return check_payslip(data)
+
+
+@pytest.mark.parametrize("drop_section", [False, True])
+@pytest.mark.parametrize("engine", payslip_render.RENDER_ENGINES)
+def test_older_records_show_the_month_in_missing_jahreswert_cells(engine, drop_section):
+    data = _older_record(drop_section)
+    with pymupdf.open(stream=payslip_render.render_payslip_bytes(data, engine), filetype="pdf") as document:
+        text = document[0].get_text()
+    # Betrag and Jahreswert of the "/408 LSt pausch AG" row
+    assert text.count(format_currency(data["zahlungsdetails"]["sv_ag_anteil"])) >= 2
@@ -0,0 +1,37 @@
+import re
+
+import pytest
+
+import payslip_render
+from salary_template_generator import PayslipValidationError, check_payslip
+from test_data_generator import iter_payslip_records
+
+
+def _record(**line_items):
+    data = next(iter_payslip_records(1, 1, seed=4))
+    data["verdienst"]["zusaetze"] = line_items.get("zusaetze")
+    data["zahlungsdetails"]["abzuege"] = line_items.get("abzuege")
+    return data
+
+
+def test_valid_line_items_pass_the_schema():
+    check_payslip(_record(zusaetze=[{"lohnart": "2301 GWV", "kenn": "LSG", "betrag": 3.17}], abzuege=[]))
+
+
+def test_bad_line_items_fail_the_schema_with_every_problem():
+    data = _record(zusaetze=[{"lohnart": "2301 GWV", "betrag": "abc"}, "oops"], abzuege="none")
+    with pytest.raises(PayslipValidationError) as excinfo:
+        check_payslip(data)
+    assert excinfo.value.errors == [
+        "verdienst.zusaetze[0].betrag must be a number, got 'abc'",
+        "verdienst.zusaetze[1] must be an object, got 'oops'",
+        "zahlungsdetails.abzuege must be a list of line items, got 'none'",
+    ]
+
+
+def test_long_line_item_lists_number_their_pages():
+    pymupdf = pytest.importorskip("pymupdf")
+    data = _record(zusaetze=[{"lohnart": f"Zusatz {number}", "betrag": number * 1.5} for number in range(90)])
+    with pymupdf.open(stream=payslip_render.render_payslip_bytes(data), filetype="pdf") as document:
+        labels = [re.findall(r"Seite \d+/\d+", page.get_text()) for page in document]
+    assert labels == [["Seite 1/3"], ["Seite 2/3"], ["Seite 3/3"]]
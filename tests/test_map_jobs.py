@@ -0,0 +1,20 @@
+import salary_template_generator as stg
+
+
+def test_lazy_jobs_keep_their_order():
+    results = stg._map_jobs(abs, (-number for number in range(300)), 3)
+    assert list(results) == list(range(300))
+
+
+def test_lazy_chunks_start_small_for_every_worker():
+    sizes = [stg._stream_chunk_size(submitted, 16) for submitted in range(200)]
+    # The first round gives every worker a single job, later rounds double up to the cap
+    assert sizes[:16] == [1] * 16
+    assert sizes[16:32] == [2] * 16
+    assert max(sizes) == sizes[-1] == stg.STREAM_CHUNK_SIZE
+    # 128 jobs on 16 workers are spread over more than 16 chunks
+    total, chunks = 0, 0
+    while total < 128:
+        total += sizes[chunks]
+        chunks += 1
+    assert chunks > 16
@@ -0,0 +1,49 @@
+import json
+import threading
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from payslip_service import PayslipRequestHandler, PayslipService
+from test_data_generator import iter_payslip_records
+
+
+@pytest.fixture(scope="module")
+def server():
+    service = PayslipService(workers=1, timeout=30.0)
+    handler = type("Handler", (PayslipRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _post(server, body):
+    connection = HTTPConnection(*server.server_address, timeout=30)
+    connection.request("POST", "/payslip", body=json.dumps(body).encode("utf-8"))
+    response = connection.getresponse()
+    return response.status, response.getheader("Content-Type"), response.read()
+
+
+def test_valid_record_is_rendered(server):
+    status, content_type, body = _post(server, next(iter_payslip_records(1, 1, seed=1)))
+    assert status == 200
+    assert content_type == "application/pdf"
+    assert body.startswith(b"%PDF")
+
+
+def test_invalid_record_gets_every_error(server):
+    record = next(iter_payslip_records(1, 1, seed=1))
+    del record["abrechnungsdetails"]
+    record["verdienst"]["betrag"] = "abc"
+    status, _, body = _post(server, record)
+    assert status == 400
+    assert json.loads(body)["errors"] == [
+        "abrechnungsdetails is missing",
+        "verdienst.betrag must be a number, got 'abc'",
+    ]
+    assert server.RequestHandlerClass.service.metrics()["invalid"] == 1
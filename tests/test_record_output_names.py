@@ -0,0 +1,27 @@
+import copy
+import os
+import zipfile
+
+from salary_template_generator import generate_pdfs_from_records
+from test_data_generator import iter_payslip_records
+
+
+def _namesakes():
+    first, second = copy.deepcopy(list(iter_payslip_records(2, 1, seed=6)))
+    second["arbeitnehmer"]["name"] = first["arbeitnehmer"]["name"]
+    return [("first", first), ("second", second)]
+
+
+def test_namesakes_get_their_own_pdfs(tmp_path):
+    summary = generate_pdfs_from_records(_namesakes(), str(tmp_path), workers=1)
+    assert (summary["succeeded"], summary["failed"]) == (2, [])
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_records_sharing_an_output_name_fail_instead_of_replacing_it(tmp_path):
+    archive = str(tmp_path / "payslips.zip")
+    summary = generate_pdfs_from_records(_namesakes(), str(tmp_path), workers=1, name_template="payslip_{name}.pdf", archive=archive)
+    assert summary["succeeded"] == 1
+    assert [label for label, _ in summary["failed"]] == ["second"]
+    with zipfile.ZipFile(archive) as zf:
+        assert len(zf.namelist()) == 1
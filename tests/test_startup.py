@@ -0,0 +1,6 @@
+import benchmark
+
+
+def test_clis_start_within_their_budgets():
+    results, over_budget = benchmark.bench_startup()
+    assert over_budget == [], results
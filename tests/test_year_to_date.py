@@ -0,0 +1,22 @@
+import copy
+
+import pytest
+
+from payslip_ytd import YearToDate
+from salary_template_generator import generate_pdfs_from_json
+from test_data_generator import iter_payslip_records
+
+
+def test_employees_sharing_a_personal_number_keep_their_own_totals():
+    records = list(iter_payslip_records(2, 2, seed=2))
+    # January of the first employee, February of the second
+    first, second = records[0], copy.deepcopy(records[3])
+    second["arbeitnehmer"]["personal_nummer"] = first["arbeitnehmer"]["personal_nummer"]
+    year_to_date = YearToDate()
+    year_to_date.add(first)
+    assert year_to_date.add(second)["gesamt_jahres_brutto"] == second["verdienst"]["gesamt_brutto"]
+
+
+def test_year_to_date_state_cannot_be_sharded(tmp_path):
+    with pytest.raises(ValueError, match="sharding"):
+        generate_pdfs_from_json(str(tmp_path), workers=1, ytd_state=str(tmp_path / "ytd.json"), shard=(0, 2))